@@ -1,63 +1,246 @@
 # CRIME CLUSTERING USING K-MEANS
+#
+# Headless model selection for the backend's KMeans model:
+#   python KMeans.py                      # sweep k=1..20, write artifacts/
+#   python KMeans.py --jobs 4 --k-max 30  # parallel sweep over more k values
+#   python KMeans.py --show               # also open the plots interactively
+#
+# Writes artifacts/kmeans_selection.json (read by MLModelService._train_model)
+# plus elbow_curve.png and clusters.png. Sweep results and the KernelPCA
+# projection are cached per dataset hash under artifacts/cache/.
 
 # -------------------- Importing Dependencies --------------------
+import argparse
+import hashlib
+import json
+import os
+import time
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from joblib import Parallel, delayed
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.decomposition import KernelPCA
+from sklearn.metrics import silhouette_score
 
-# -------------------- Data Loading & Preparation --------------------
-crime_data = pd.read_csv('crime.csv')
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
 # Selecting relevant numerical attributes
 cols_to_use = [1, 2, 3, 4, 5, 6, 7, 12]
-crime_features = crime_data.iloc[:, cols_to_use].values
 
-# Standardizing data for fair clustering
-normalizer = StandardScaler()
-norm_data = normalizer.fit_transform(crime_features)
+# Above this many rows the sweep switches to MiniBatchKMeans (with --algorithm auto)
+MINIBATCH_THRESHOLD = 10000
+
+# Silhouette is O(n^2); score on a fixed-size sample for large inputs
+SILHOUETTE_SAMPLE_SIZE = 10000
+
+cluster_colors = ['red', 'blue', 'green', 'cyan', 'magenta', 'black',
+                  'orange', 'purple', 'brown', 'olive', 'pink', 'gray']
+
+
+# -------------------- Data Loading & Preparation --------------------
+def load_features(csv_path):
+    """Load crime.csv and return standardized clustering features."""
+    crime_data = pd.read_csv(csv_path)
+    crime_features = crime_data.iloc[:, cols_to_use].values
+
+    # Standardizing data for fair clustering
+    normalizer = StandardScaler()
+    return normalizer.fit_transform(crime_features)
+
+
+def dataset_hash(norm_data):
+    """Stable hash of the standardized feature matrix."""
+    digest = hashlib.sha256()
+    digest.update(str(norm_data.shape).encode())
+    digest.update(np.ascontiguousarray(norm_data, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def make_model(k, algorithm, random_state=42):
+    """Build a KMeans or MiniBatchKMeans model with the project's settings."""
+    if algorithm == 'minibatch':
+        return MiniBatchKMeans(n_clusters=k, init='k-means++', n_init='auto',
+                               batch_size=4096, random_state=random_state)
+    return KMeans(n_clusters=k, init='k-means++', n_init='auto', random_state=random_state)
+
 
 # -------------------- Finding Optimal k (Elbow Rule) --------------------
-distortions = []
-K_range = range(1, 21)
-
-for k in K_range:
-    km = KMeans(n_clusters=k, init='k-means++', n_init='auto', random_state=42)
-    km.fit(norm_data)
-    distortions.append(km.inertia_)
-
-plt.figure(figsize=(8, 5))
-plt.plot(K_range, distortions, 'bo--', linewidth=2, markersize=6)
-plt.title('Elbow Curve for Optimal Clusters')
-plt.xlabel('Number of Clusters (k)')
-plt.ylabel('Distortion (Inertia)')
-plt.grid(True)
-plt.show()
-
-# -------------------- Model Training --------------------
-n_clusters = 6
-model = KMeans(n_clusters=n_clusters, init='k-means++', n_init='auto', random_state=42)
-labels = model.fit_predict(norm_data)
+def evaluate_k(norm_data, k, algorithm):
+    """Fit one model and compute inertia and silhouette from the same fit."""
+    model = make_model(k, algorithm)
+    labels = model.fit_predict(norm_data)
+
+    silhouette = None
+    if 2 <= k < len(norm_data):
+        sample_size = min(len(norm_data), SILHOUETTE_SAMPLE_SIZE)
+        silhouette = float(silhouette_score(norm_data, labels, sample_size=sample_size, random_state=42))
+
+    return {'k': k, 'inertia': float(model.inertia_), 'silhouette': silhouette}
+
+
+def sweep_k(norm_data, k_range, algorithm, n_jobs):
+    """Evaluate every k in parallel across processes."""
+    return Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_k)(norm_data, k, algorithm) for k in k_range
+    )
+
+
+def elbow_k(results):
+    """Pick the elbow: the k farthest from the line joining the first and last inertia."""
+    ks = np.array([r['k'] for r in results], dtype=float)
+    inertias = np.array([r['inertia'] for r in results], dtype=float)
+    if len(ks) < 3:
+        return int(ks[-1])
+
+    # Normalize both axes so the distance is scale-free
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    y = (inertias - inertias[-1]) / max(inertias[0] - inertias[-1], 1e-12)
+    distances = np.abs(x + y - 1) / np.sqrt(2)
+    return int(ks[np.argmax(distances)])
+
+
+def silhouette_k(results):
+    """Pick the k with the best silhouette score."""
+    scored = [r for r in results if r['silhouette'] is not None]
+    return max(scored, key=lambda r: r['silhouette'])['k'] if scored else None
+
 
 # -------------------- Dimensionality Reduction for Visualization --------------------
-pca_mapper = KernelPCA(n_components=2, kernel='rbf', gamma=0.03)
-proj_2d = pca_mapper.fit_transform(norm_data)
-
-# -------------------- Cluster Visualization --------------------
-cluster_colors = ['red', 'blue', 'green', 'cyan', 'magenta', 'black']
-for idx in range(n_clusters):
-    plt.scatter(proj_2d[labels == idx, 0], proj_2d[labels == idx, 1], 
-                s=90, color=cluster_colors[idx], label=f'Cluster {idx+1}')
-
-# Plot centroids (approximate in reduced space)
-centers_approx = pca_mapper.transform(model.cluster_centers_)
-plt.scatter(centers_approx[:, 0], centers_approx[:, 1], 
-            s=300, c='yellow', edgecolors='black', marker='*', label='Cluster Centers')
-
-plt.title('K-Means Cluster Visualization')
-plt.xlabel('Principal Axis 1')
-plt.ylabel('Principal Axis 2')
-plt.legend()
-plt.show()
\ No newline at end of file
+def project_2d(norm_data, cache_dir):
+    """KernelPCA projection, cached per dataset hash (it is the slowest step)."""
+    import joblib
+
+    mapper_path = os.path.join(cache_dir, 'kernel_pca.joblib')
+    proj_path = os.path.join(cache_dir, 'kernel_pca_proj.npy')
+    if os.path.exists(mapper_path) and os.path.exists(proj_path):
+        return joblib.load(mapper_path), np.load(proj_path)
+
+    pca_mapper = KernelPCA(n_components=2, kernel='rbf', gamma=0.03)
+    proj_2d = pca_mapper.fit_transform(norm_data)
+    joblib.dump(pca_mapper, mapper_path)
+    np.save(proj_path, proj_2d)
+    return pca_mapper, proj_2d
+
+
+# -------------------- Plots --------------------
+def save_plots(plt, results, norm_data, n_clusters, algorithm, cache_dir, out_dir, show):
+    """Write the elbow curve and cluster visualization to out_dir."""
+    k_values = [r['k'] for r in results]
+    distortions = [r['inertia'] for r in results]
+
+    plt.figure(figsize=(8, 5))
+    plt.plot(k_values, distortions, 'bo--', linewidth=2, markersize=6)
+    plt.axvline(n_clusters, color='red', linestyle=':', label=f'Selected k = {n_clusters}')
+    plt.title('Elbow Curve for Optimal Clusters')
+    plt.xlabel('Number of Clusters (k)')
+    plt.ylabel('Distortion (Inertia)')
+    plt.legend()
+    plt.grid(True)
+    plt.savefig(os.path.join(out_dir, 'elbow_curve.png'), dpi=120, bbox_inches='tight')
+    if show:
+        plt.show()
+    plt.close()
+
+    # -------------------- Model Training --------------------
+    model = make_model(n_clusters, algorithm)
+    labels = model.fit_predict(norm_data)
+
+    # -------------------- Cluster Visualization --------------------
+    pca_mapper, proj_2d = project_2d(norm_data, cache_dir)
+
+    plt.figure(figsize=(8, 6))
+    for idx in range(n_clusters):
+        plt.scatter(proj_2d[labels == idx, 0], proj_2d[labels == idx, 1],
+                    s=90, color=cluster_colors[idx % len(cluster_colors)], label=f'Cluster {idx+1}')
+
+    # Plot centroids (approximate in reduced space)
+    centers_approx = pca_mapper.transform(model.cluster_centers_)
+    plt.scatter(centers_approx[:, 0], centers_approx[:, 1],
+                s=300, c='yellow', edgecolors='black', marker='*', label='Cluster Centers')
+
+    plt.title('K-Means Cluster Visualization')
+    plt.xlabel('Principal Axis 1')
+    plt.ylabel('Principal Axis 2')
+    plt.legend()
+    plt.savefig(os.path.join(out_dir, 'clusters.png'), dpi=120, bbox_inches='tight')
+    if show:
+        plt.show()
+    plt.close()
+
+
+# -------------------- Entry Point --------------------
+def main():
+    parser = argparse.ArgumentParser(description='Select k for the crime KMeans model')
+    parser.add_argument('--data', default=os.path.join(PROJECT_ROOT, 'crime.csv'))
+    parser.add_argument('--out-dir', default=os.path.join(PROJECT_ROOT, 'artifacts'))
+    parser.add_argument('--k-min', type=int, default=1)
+    parser.add_argument('--k-max', type=int, default=20)
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel workers (-1 = all cores)')
+    parser.add_argument('--algorithm', choices=['auto', 'kmeans', 'minibatch'], default='auto')
+    parser.add_argument('--method', choices=['elbow', 'silhouette'], default='elbow')
+    parser.add_argument('--k', type=int, help='Force this k instead of selecting one')
+    parser.add_argument('--no-plots', action='store_true')
+    parser.add_argument('--show', action='store_true', help='Open plots interactively')
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    norm_data = load_features(args.data)
+    k_max = min(args.k_max, len(norm_data))
+    k_range = range(args.k_min, k_max + 1)
+
+    algorithm = args.algorithm
+    if algorithm == 'auto':
+        algorithm = 'minibatch' if len(norm_data) > MINIBATCH_THRESHOLD else 'kmeans'
+
+    data_hash = dataset_hash(norm_data)
+    cache_dir = os.path.join(args.out_dir, 'cache', data_hash)
+    os.makedirs(cache_dir, exist_ok=True)
+    sweep_path = os.path.join(cache_dir, f'sweep_{algorithm}_{args.k_min}_{k_max}.json')
+
+    if os.path.exists(sweep_path) and not args.no_cache:
+        with open(sweep_path) as f:
+            results = json.load(f)
+        print(f'Loaded cached sweep for dataset {data_hash}')
+    else:
+        results = sweep_k(norm_data, k_range, algorithm, args.jobs)
+        with open(sweep_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Swept k={args.k_min}..{k_max} with {algorithm} for dataset {data_hash}')
+
+    if args.k:
+        n_clusters, method = args.k, 'manual'
+    elif args.method == 'silhouette' and silhouette_k(results):
+        n_clusters, method = silhouette_k(results), 'silhouette'
+    else:
+        n_clusters, method = elbow_k(results), 'elbow'
+
+    selection = {
+        'n_clusters': n_clusters,
+        'method': method,
+        'algorithm': algorithm,
+        'dataset_hash': data_hash,
+        'n_samples': len(norm_data),
+        'elbow_k': elbow_k(results),
+        'silhouette_k': silhouette_k(results),
+        'results': results,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    with open(os.path.join(args.out_dir, 'kmeans_selection.json'), 'w') as f:
+        json.dump(selection, f, indent=2)
+
+    if not args.no_plots:
+        import matplotlib
+        if not args.show:
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        save_plots(plt, results, norm_data, n_clusters, algorithm, cache_dir, args.out_dir, args.show)
+
+    print(f'Selected k = {n_clusters} ({method}) in {time.perf_counter() - started:.1f}s '
+          f'-> {os.path.join(args.out_dir, "kmeans_selection.json")}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Admission Control for SafarSaheli Backend
+
+ASGI middleware that decides, before any handler runs, whether a request is
+admitted. Requests are sorted into lanes by path:
+
+- emergency lane (/sos, /send-sms) and health probes are reserved: always
+  admitted, never rate limited or counted against other lanes' capacity
+- limited lanes (routing, heatmap, admin) have a concurrency cap (503 when
+  full) and a per-client token bucket (429 when exhausted)
+
+Excess routing load is shed early and cheaply, so it cannot build a queue on
+the shared event loop in front of emergency requests.
+"""
+
+import json
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from upstream import TokenBucket
+
+
+class Lane:
+    """Admission policy and counters for one group of endpoints."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: Optional[int] = None,
+        rate_per_min: Optional[float] = None,
+        burst: Optional[float] = None,
+        reserved: bool = False,
+        max_clients: int = 10000
+    ):
+        """
+        Args:
+            name: Lane name (for metrics)
+            max_concurrency: Requests allowed in flight at once (None = unlimited)
+            rate_per_min: Sustained requests per minute per client (None = unlimited)
+            burst: Per-client burst size (defaults to rate_per_min / 6)
+            reserved: Always admit (emergency lane)
+            max_clients: Per-client buckets kept before the least recent are dropped
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.rate_per_s = rate_per_min / 60.0 if rate_per_min else None
+        self.burst = burst or (max(1.0, rate_per_min / 6.0) if rate_per_min else None)
+        self.reserved = reserved
+        self.max_clients = max_clients
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected_busy = 0
+        self.rejected_rate = 0
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_s, self.burst)
+            self._buckets[client] = bucket
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def try_admit(self, client: str) -> Optional[Tuple[int, str, int]]:
+        """
+        Admit a request or explain why not.
+
+        Returns:
+            None if admitted (caller must release()), else (status, detail, retry_after_s)
+        """
+        if not self.reserved:
+            if self.max_concurrency is not None and self.in_flight >= self.max_concurrency:
+                self.rejected_busy += 1
+                return 503, "Server busy, please retry shortly", 1
+
+            if self.rate_per_s:
+                bucket = self._bucket(client)
+                if not bucket.try_take():
+                    self.rejected_rate += 1
+                    return 429, "Too many requests, please slow down", max(1, math.ceil(bucket.time_until()))
+
+        self.in_flight += 1
+        self.admitted += 1
+        return None
+
+    def release(self):
+        """Mark an admitted request as finished."""
+        self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        """Admission counters for this lane."""
+        return {
+            "reserved": self.reserved,
+            "max_concurrency": self.max_concurrency,
+            "rate_per_min": round(self.rate_per_s * 60, 2) if self.rate_per_s else None,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rejected": {"busy": self.rejected_busy, "rate_limited": self.rejected_rate},
+        }
+
+
+class AdmissionController:
+    """Maps request paths to lanes and identifies clients."""
+
+    def __init__(self, routes: List[Tuple[str, Lane]], default_lane: Lane, trusted_proxy_hops: int = 0):
+        """
+        Args:
+            routes: (path or path prefix ending in "/", lane) pairs, checked in order
+            default_lane: Lane for paths not matched by routes
+            trusted_proxy_hops: Number of proxies in front of the server that append
+                to X-Forwarded-For (0 = ignore the header, use the socket peer)
+        """
+        self.routes = routes
+        self.default_lane = default_lane
+        self.trusted_proxy_hops = trusted_proxy_hops
+
+    def lane_for(self, path: str) -> Lane:
+        """Pick the lane for a request path."""
+        for pattern, lane in self.routes:
+            if path == pattern or (pattern.endswith("/") and path.startswith(pattern)):
+                return lane
+        return self.default_lane
+
+    def client_id(self, scope: Dict) -> str:
+        """
+        Client identity used for per-client rate limits.
+
+        Entries left of those appended by our own proxies are whatever the
+        client sent, so the address is read trusted_proxy_hops entries from
+        the right of X-Forwarded-For, never from the left.
+        """
+        if self.trusted_proxy_hops > 0:
+            forwarded = []
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    forwarded.extend(entry.strip() for entry in value.decode("latin-1").split(","))
+            if len(forwarded) >= self.trusted_proxy_hops:
+                return forwarded[-self.trusted_proxy_hops]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def stats(self) -> Dict:
+        """Admission counters for every lane."""
+        lanes = {lane.name: lane for _, lane in self.routes}
+        lanes[self.default_lane.name] = self.default_lane
+        return {name: lane.stats() for name, lane in lanes.items()}
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware applying an AdmissionController to HTTP requests."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        lane = self.controller.lane_for(scope["path"])
+        rejection = lane.try_admit(self.controller.client_id(scope))
+        if rejection is not None:
+            status, detail, retry_after = rejection
+            body = json.dumps({"detail": detail}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release()
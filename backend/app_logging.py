@@ -0,0 +1,181 @@
+"""
+Logging for SafarSaheli Backend
+
+Structured, non-blocking logging for every backend module:
+
+- records are put on an in-memory queue by the calling thread (the event loop
+  on request paths) and written to stdout by a background listener thread,
+  so request handlers never wait on a slow log sink
+- the queue is bounded; when the sink cannot keep up, records are dropped and
+  counted instead of growing memory or blocking the loop
+- LOG_FORMAT=json writes one JSON object per line with any `extra=` fields
+  as keys; the default text format reads like the old print() output
+- per-route debug lines (e.g. route scoring details) are sampled with
+  should_sample() so DEBUG logging stays affordable under load
+
+Usage:
+    logger = get_logger("ml_service")
+    logger.info("Loaded %d crime data points", n)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# Records buffered for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Fraction of per-route debug lines that are logged (see should_sample)
+LOG_ROUTE_SAMPLE_RATE = float(os.getenv("LOG_ROUTE_SAMPLE_RATE", "0.1"))
+
+ROOT_LOGGER = "safarsaheli"
+
+# uvicorn writes an access line per request; it goes through the same queue
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# Attributes every LogRecord has; anything else came from `extra=` (uvicorn's
+# color_message duplicates the message with terminal colors)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "color_message"
+}
+
+
+def _component(record: logging.LogRecord) -> str:
+    """Logger name without the package prefix (safarsaheli.ml_service -> ml_service)."""
+    prefix = ROOT_LOGGER + "."
+    return record.name[len(prefix):] if record.name.startswith(prefix) else record.name
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines: time, level, [component] message key=value extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{self.formatTime(record)} {record.levelname:<7} [{_component(record)}] {record.getMessage()}"
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line with extra fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": _component(record),
+            "message": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class BufferedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks and leaves formatting to the writer thread.
+
+    The caller only resolves the message arguments (so later mutation of the
+    arguments cannot change the line); formatting and I/O happen in the
+    QueueListener thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_lock = threading.Lock()
+_handler: Optional[BufferedQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging():
+    """
+    Start the queue-backed log writer (idempotent; get_logger calls it).
+
+    Backend loggers and uvicorn's loggers are attached to the queue; their
+    records are formatted per LOG_FORMAT and written to stdout by one
+    background thread.
+    """
+    global _handler, _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+        _handler = BufferedQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        level = getattr(logging, LOG_LEVEL, logging.INFO)
+        for name in (ROOT_LOGGER,) + UVICORN_LOGGERS:
+            logger = logging.getLogger(name)
+            logger.handlers = [_handler]
+            logger.propagate = False
+            if name in (ROOT_LOGGER, "uvicorn"):
+                logger.setLevel(level)
+
+
+def shutdown_logging():
+    """Write out buffered records and stop the writer thread."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(component: str) -> logging.Logger:
+    """Logger for a backend component (e.g. "ml_service"), with logging set up."""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{component}")
+
+
+def should_sample(rate: float = LOG_ROUTE_SAMPLE_RATE) -> bool:
+    """True for roughly `rate` of calls; use to thin out per-route debug lines."""
+    return rate >= 1.0 or random.random() < rate
+
+
+def stats() -> Dict:
+    """Queue depth and records dropped because the writer fell behind."""
+    return {
+        "level": LOG_LEVEL,
+        "format": LOG_FORMAT,
+        "queued": _handler.queue.qsize() if _handler is not None else 0,
+        "dropped": _handler.dropped if _handler is not None else 0,
+    }
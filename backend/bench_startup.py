@@ -0,0 +1,78 @@
+"""
+Startup benchmark for SafarSaheli Backend
+
+Measures, each in a fresh interpreter (median of several runs):
+- importing main.py, and which heavy modules that pulls in
+- the heavy imports main.py used to do eagerly (pandas, scikit-learn, twilio)
+- building the ML service from crime.csv vs loading the prebuilt artifact
+
+Usage:
+    python bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CRIME_CSV = os.path.join(os.path.dirname(BACKEND_DIR), "crime.csv")
+HEAVY_MODULES = ["pandas", "sklearn", "twilio"]
+
+SCENARIOS = {
+    "import main": "import main",
+    "eager heavy imports (before)": (
+        "import pandas, sklearn.preprocessing, sklearn.cluster, twilio.rest"
+    ),
+    "build model from CSV": (
+        "from ml_service import MLModelService; MLModelService({csv!r})"
+    ),
+    "load model from artifact": (
+        "from ml_service import MLModelService; MLModelService.load({csv!r}, {artifact!r})"
+    ),
+}
+
+TIMER = """
+import json, sys, time
+started = time.perf_counter()
+{code}
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{"ms": elapsed_ms, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_once(code: str) -> dict:
+    """Run code in a fresh interpreter and return its timing JSON."""
+    # Quiet logging: buffered log lines are flushed at exit, after the timing line
+    env = dict(os.environ, MODEL_WATCH_INTERVAL_S="0", LOG_LEVEL="ERROR")
+    result = subprocess.run(
+        [sys.executable, "-c", TIMER.format(code=code, heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend import/startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifact = os.path.join(tmp_dir, "crime_model.npz")
+        # Build the artifact once so the artifact scenario measures loading only
+        run_once(SCENARIOS["load model from artifact"].format(csv=CRIME_CSV, artifact=artifact))
+
+        print(f"{'scenario':<32} {'median ms':>10} {'min ms':>8}  heavy modules loaded")
+        for name, code in SCENARIOS.items():
+            code = code.format(csv=CRIME_CSV, artifact=artifact)
+            runs = [run_once(code) for _ in range(args.runs)]
+            times = [r["ms"] for r in runs]
+            loaded = ", ".join(runs[-1]["loaded"]) or "-"
+            print(f"{name:<32} {statistics.median(times):>10.1f} {min(times):>8.1f}  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
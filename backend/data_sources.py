@@ -0,0 +1,117 @@
+"""
+Data Sources for SafarSaheli Backend
+
+Readers for crime data files with column projection, so model builds only
+load the columns they use:
+
+- CSV (.csv): pandas, streamed in chunks
+- Parquet (.parquet, .pq), Feather / Arrow IPC (.feather, .arrow): pyarrow,
+  streamed as record batches
+
+count_rows lets a loader preallocate its arrays before streaming into them.
+
+pandas and pyarrow are imported lazily; pyarrow is only needed for columnar
+files (pip install pyarrow).
+"""
+
+import os
+from typing import Iterator, List
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".feather", ".arrow")
+
+# Rows per chunk when streaming large crime and incident files
+INCIDENT_CHUNK_ROWS = int(os.getenv("INCIDENT_CHUNK_ROWS", "100000"))
+
+
+def _format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PARQUET_EXTENSIONS:
+        return "parquet"
+    if ext in ARROW_EXTENSIONS:
+        return "arrow"
+    return "csv"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Reading Parquet/Feather crime data requires pyarrow (pip install pyarrow)") from e
+
+
+def read_column_names(path: str) -> List[str]:
+    """Column names of a data file, read from its header/schema only."""
+    fmt = _format(path)
+    if fmt == "csv":
+        import pandas as pd
+        return list(pd.read_csv(path, nrows=0).columns)
+
+    _require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+
+    import pyarrow.ipc as ipc
+    with ipc.open_file(path) as reader:
+        return list(reader.schema.names)
+
+
+def count_rows(path: str) -> int:
+    """
+    Number of data rows in a file.
+
+    Parquet and Arrow files record it in their metadata; a CSV is streamed
+    once reading only its first column.
+    """
+    fmt = _format(path)
+    if fmt == "csv":
+        import pandas as pd
+        with pd.read_csv(path, usecols=[0], chunksize=INCIDENT_CHUNK_ROWS) as reader:
+            return sum(len(chunk) for chunk in reader)
+
+    _require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+
+    import pyarrow.ipc as ipc
+    with ipc.open_file(path) as reader:
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def iter_chunks(path: str, columns: List[str], chunk_rows: int = INCIDENT_CHUNK_ROWS) -> Iterator:
+    """
+    Stream a data file as DataFrames of at most chunk_rows rows.
+
+    Only one chunk (of the requested columns) is in memory at a time.
+
+    Args:
+        path: CSV, Parquet or Feather file
+        columns: Column names to load
+        chunk_rows: Rows per chunk
+
+    Yields:
+        pandas DataFrames with the requested columns
+    """
+    fmt = _format(path)
+    if fmt == "csv":
+        import pandas as pd
+        with pd.read_csv(path, usecols=columns, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield chunk[columns]
+        return
+
+    _require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()[columns]
+        return
+
+    import pyarrow.ipc as ipc
+    with ipc.open_file(path) as reader:
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i).select(columns)
+            for start in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(start, chunk_rows).to_pandas()[columns]
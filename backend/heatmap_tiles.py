@@ -0,0 +1,222 @@
+"""
+Heatmap Tiles for SafarSaheli Backend
+
+Renders the ML service's risk field (MLModelService.point_risks, the same field
+used for route scoring) into 256x256 PNG map tiles addressed by z/x/y in the
+standard Web Mercator tiling scheme. Each tile is rendered once per model
+snapshot and kept in an in-memory LRU (optionally mirrored to disk), so repeat
+requests and CDN revalidations cost almost no CPU.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ml_service import MLModelService, RISK_RADIUS_KM
+
+TILE_SIZE = 256
+MAX_ZOOM = 18
+
+# Risk value rendered at full intensity (matches the severity normalization in scoring)
+RISK_SATURATION = 800.0
+
+
+def _encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an (H, W, 4) uint8 array as a PNG using only the standard library."""
+    height, width, _ = rgba.shape
+    # Each scanline is prefixed with filter type 0 (None)
+    raw = np.empty((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)) + chunk(b"IEND", b""))
+
+
+EMPTY_TILE = _encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Return (south, west, north, east) of a Web Mercator tile in degrees."""
+    n = 2 ** z
+
+    def lat_at(ty: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lat_at(y + 1), x / n * 360.0 - 180.0, lat_at(y), (x + 1) / n * 360.0 - 180.0
+
+
+def _pixel_centers(z: int, x: int, y: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude/longitude of every pixel center in a tile, as (TILE_SIZE, TILE_SIZE) arrays."""
+    n = 2 ** z
+    offsets = (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+    lngs = (x + offsets) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    return np.meshgrid(lats, lngs, indexing="ij")
+
+
+def _colorize(risks: np.ndarray, has_nearby: np.ndarray) -> np.ndarray:
+    """Map risk values to RGBA: transparent where no data, green -> yellow -> red with rising opacity."""
+    level = np.clip(risks / RISK_SATURATION, 0.0, 1.0)
+    rgba = np.zeros(risks.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = np.clip(level * 2, 0, 1) * 255
+    rgba[..., 1] = np.clip(2 - level * 2, 0, 1) * 200
+    rgba[..., 2] = 0
+    rgba[..., 3] = np.where(has_nearby, 40 + level * 130, 0)
+    return rgba
+
+
+class HeatmapTileCache:
+    """
+    Renders and caches risk heatmap tiles for the current model snapshot.
+
+    Tiles are keyed by a fingerprint of the crime data they were rendered from,
+    so a model reload or incremental update naturally produces new tiles (and
+    new ETags) without serving stale ones.
+    """
+
+    def __init__(self, max_entries: int = 2048, disk_dir: Optional[str] = None):
+        """
+        Args:
+            max_entries: Maximum number of tiles kept in memory
+            disk_dir: Optional directory to persist rendered tiles across restarts
+        """
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._tiles: "OrderedDict[Tuple[str, int, int, int], bytes]" = OrderedDict()
+        self._rendering: Dict[Tuple[str, int, int, int], asyncio.Future] = {}
+        self.rendered = 0
+        self.hits = 0
+
+    @staticmethod
+    def fingerprint(service: MLModelService) -> str:
+        """Short hash of the crime data a service scores with."""
+        crime_points = service.crime_points
+        cached = getattr(service, "_heatmap_fingerprint", None)
+        if cached and cached[0] is crime_points:
+            return cached[1]
+
+        digest = hashlib.sha256(np.ascontiguousarray(crime_points, dtype=float).tobytes()).hexdigest()[:12]
+        service._heatmap_fingerprint = (crime_points, digest)
+        return digest
+
+    def etag(self, fingerprint: str, z: int, x: int, y: int) -> str:
+        """Strong ETag for a tile."""
+        return f'"{fingerprint}-{z}-{x}-{y}"'
+
+    def clear(self, *_):
+        """Drop all in-memory tiles (called when a new model is swapped in)."""
+        self._tiles.clear()
+
+    def _disk_path(self, key: Tuple[str, int, int, int]) -> str:
+        fingerprint, z, x, y = key
+        return os.path.join(self.disk_dir, fingerprint, str(z), str(x), f"{y}.png")
+
+    def _remember(self, key: Tuple[str, int, int, int], tile: bytes):
+        self._tiles[key] = tile
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.max_entries:
+            self._tiles.popitem(last=False)
+
+    def _render(self, service: MLModelService, key: Tuple[str, int, int, int]) -> bytes:
+        """Render (or load from disk) one tile. Runs in a worker thread."""
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    return f.read()
+
+        _, z, x, y = key
+        tile = self._render_tile(service, z, x, y)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(tile)
+            os.replace(tmp_path, path)
+
+        return tile
+
+    def _render_tile(self, service: MLModelService, z: int, x: int, y: int) -> bytes:
+        """Evaluate the risk field at every pixel of a tile and encode it."""
+        crime_points = service.crime_points
+        if len(crime_points) == 0:
+            return EMPTY_TILE
+
+        # Skip tiles that are entirely beyond the risk radius of every crime data point
+        south, west, north, east = tile_bounds(z, x, y)
+        margin_lat = RISK_RADIUS_KM / 111.0
+        margin_lng = margin_lat / max(math.cos(math.radians(min(abs(south), abs(north)))), 0.01)
+        if (crime_points[:, 0].max() + margin_lat < south or crime_points[:, 0].min() - margin_lat > north or
+                crime_points[:, 1].max() + margin_lng < west or crime_points[:, 1].min() - margin_lng > east):
+            return EMPTY_TILE
+
+        lats, lngs = _pixel_centers(z, x, y)
+        risks, has_nearby = service.point_risks(lats, lngs)
+        if not has_nearby.any():
+            return EMPTY_TILE
+
+        shape = (TILE_SIZE, TILE_SIZE)
+        return _encode_png(_colorize(risks.reshape(shape), has_nearby.reshape(shape)))
+
+    async def get_tile(self, service: MLModelService, z: int, x: int, y: int) -> Tuple[bytes, str]:
+        """
+        Return (png_bytes, etag) for a tile, rendering it at most once.
+
+        Concurrent requests for the same uncached tile share a single render.
+        If the request doing the render is cancelled, a waiter takes it over.
+        """
+        fingerprint = self.fingerprint(service)
+        key = (fingerprint, z, x, y)
+        etag = self.etag(fingerprint, z, x, y)
+
+        while True:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self.hits += 1
+                self._tiles.move_to_end(key)
+                return tile, etag
+
+            pending = self._rendering.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending), etag
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this request itself was cancelled
+                # The shared render was cancelled with its request; retry
+
+        future = asyncio.get_running_loop().create_future()
+        self._rendering[key] = future
+        try:
+            tile = await asyncio.to_thread(self._render, service, key)
+        except asyncio.CancelledError:
+            # Release waiters rather than leave them on a future nobody resolves
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so waiters-less failures don't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._rendering[key]
+
+        self.rendered += 1
+        self._remember(key, tile)
+        future.set_result(tile)
+        return tile, etag
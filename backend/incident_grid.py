@@ -0,0 +1,103 @@
+"""
+Incident Grid for SafarSaheli Backend
+
+Turns an undated, incident-level crime feed (one row per reported incident,
+crime_incidents.csv/.parquet next to crime.csv) into gridded data points that
+the route scorer uses alongside the per-area rows of crime.csv.
+
+Incidents are streamed in chunks and reduced to per (grid cell, crime
+category) counts as they are read, so the full incident table is never held
+in memory. Each occupied cell becomes one data point at the cell centre.
+"""
+
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from data_sources import INCIDENT_CHUNK_ROWS, iter_chunks, read_column_names
+
+# Grid cell size in degrees (0.01 ~= 1.1 km)
+INCIDENT_GRID_CELL_DEG = float(os.getenv("INCIDENT_GRID_CELL_DEG", "0.01"))
+
+# Packing of (grid row, grid col) into one int64 key; categories are a final mixed-radix digit
+_CELL_OFFSET = 1 << 20
+_COL_BITS = 21
+
+KM_PER_DEGREE = 111.32
+
+
+def aggregate_incident_cells(
+    path: str,
+    categories: List[str],
+    cell_deg: float = INCIDENT_GRID_CELL_DEG,
+    chunk_rows: int = INCIDENT_CHUNK_ROWS
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Stream incidents and count them per grid cell and crime category.
+
+    Accepted columns: lat, lng, an optional `category` (one of categories,
+    matched case-insensitively) and an optional `count` weighting each row.
+    Rows without a known category are counted separately. Other columns are
+    not read.
+
+    Args:
+        path: CSV, Parquet or Feather incidents file
+        categories: Crime category names, in feature column order
+        cell_deg: Grid cell size in degrees
+        chunk_rows: Rows read per chunk
+
+    Returns:
+        (centers, counts, uncategorized, n_incidents): (M, 2) lat/lng of each
+        occupied cell's centre, (M, len(categories)) counts per category,
+        (M,) counts without a known category, and the number of incidents read
+    """
+    available = set(read_column_names(path))
+    missing = [c for c in ("lat", "lng") if c not in available]
+    if missing:
+        raise KeyError(f"Incident file missing columns: {', '.join(missing)}")
+    columns = ["lat", "lng"] + [c for c in ("category", "count") if c in available]
+
+    category_index = {name.strip().lower(): i for i, name in enumerate(categories)}
+    n_slots = len(categories) + 1  # last slot: unknown or missing category
+
+    keys = np.empty(0, dtype=np.int64)
+    sums = np.empty(0, dtype=float)
+    n_incidents = 0
+    for chunk in iter_chunks(path, columns, chunk_rows):
+        lats = chunk["lat"].to_numpy(dtype=float, na_value=np.nan)
+        lngs = chunk["lng"].to_numpy(dtype=float, na_value=np.nan)
+        if "category" in chunk.columns:
+            names = chunk["category"].astype("string").str.strip().str.lower()
+            slots = names.map(category_index).fillna(n_slots - 1).to_numpy(dtype=np.int64)
+        else:
+            slots = np.full(len(chunk), n_slots - 1, dtype=np.int64)
+        if "count" in chunk.columns:
+            weights = chunk["count"].to_numpy(dtype=float, na_value=0.0)
+        else:
+            weights = np.ones(len(chunk))
+
+        valid = (np.abs(lats) <= 90) & (np.abs(lngs) <= 180) & np.isfinite(weights)
+        rows = np.floor(lats[valid] / cell_deg).astype(np.int64)
+        cols = np.floor(lngs[valid] / cell_deg).astype(np.int64)
+        cells = (rows + _CELL_OFFSET) << _COL_BITS | (cols + _CELL_OFFSET)
+        n_incidents += int(valid.sum())
+
+        # Fold this chunk into the running per-(cell, category) totals
+        unique, inverse = np.unique(np.concatenate([keys, cells * n_slots + slots[valid]]), return_inverse=True)
+        sums = np.bincount(inverse, weights=np.concatenate([sums, weights[valid]]), minlength=len(unique))
+        keys = unique
+
+    cells, cell_of_key = np.unique(keys // n_slots, return_inverse=True)
+    table = np.zeros((len(cells), n_slots))
+    np.add.at(table, (cell_of_key, keys % n_slots), sums)
+
+    rows = (cells >> _COL_BITS) - _CELL_OFFSET
+    cols = (cells & ((1 << _COL_BITS) - 1)) - _CELL_OFFSET
+    centers = np.column_stack([(rows + 0.5) * cell_deg, (cols + 0.5) * cell_deg])
+    return centers, table[:, :-1], table[:, -1], n_incidents
+
+
+def cell_area_km2(lats: np.ndarray, cell_deg: float = INCIDENT_GRID_CELL_DEG) -> np.ndarray:
+    """Area of grid cells centred at the given latitudes, in square km."""
+    return (cell_deg * KM_PER_DEGREE) ** 2 * np.cos(np.radians(lats))
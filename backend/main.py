@@ -6,22 +6,25 @@ to provide safety-scored route recommendations based on crime data.
 
 Main Endpoints:
 - POST /safest-route: Returns the safest route between two points
-- POST /sos: Mock SOS endpoint for emergency location tracking
+- POST /sos: Mock SOS endpoint for emergency location tracking (returns nearby safe havens)
 - POST /send-sms: Send SMS alerts via Twilio to emergency contacts
+- POST /admin/reload-model: Rebuild the ML model from crime.csv without downtime
+- GET /heatmap/{z}/{x}/{y}.png: Risk heatmap map tiles
+- POST /admin/profile: Sample the running server and return a speedscope profile
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from contextlib import asynccontextmanager
-import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from datetime import datetime
+import asyncio
+import math
+import secrets
 import os
-import sys
-from twilio.rest import Client
+import numpy as np
 from dotenv import load_dotenv
 
 _backend_dir = os.path.dirname(os.path.abspath(__file__))
@@ -29,39 +32,136 @@ _project_root = os.path.dirname(_backend_dir)
 load_dotenv(os.path.join(_backend_dir, ".env"), override=True)
 load_dotenv(os.path.join(_project_root, ".env"), override=True)
 
-# Import our ML utilities (ml_service.py is in the same backend directory)
-from ml_service import MLModelService
+# Import our ML utilities (ml_service.py is in the same backend directory).
+# Heavy dependencies (pandas, scikit-learn, twilio) are imported lazily where used.
+from ml_service import GEOAPIFY_API_KEY, GEOAPIFY_KEY_MISSING_MESSAGE, MODEL_ARTIFACT_PATH
+from model_registry import ModelRegistry
+from route_cache import RouteCache, RESCORE, STALE
+from heatmap_tiles import HeatmapTileCache, MAX_ZOOM, tile_bounds
+from upstream import geoapify_breaker, geoapify_governor, PRIORITY_FALLBACK, PRIORITY_PRIMARY, UpstreamError
+from admission import AdmissionController, AdmissionControlMiddleware, Lane
+from safe_havens import SafeHavenIndex, approach_risk
+from risk_cube import hour_of_week
+from profiler import ProfileStore, ProfilingMiddleware, ProfilerBusyError, profile_for, span
+from app_logging import get_logger, stats as logging_stats
+
+logger = get_logger("backend")
+sos_logger = get_logger("sos")
+sms_logger = get_logger("sms")
+
+# Admin token guarding /admin/* endpoints (admin endpoints are disabled when unset)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# One model per region (bounding box); extra regions load on first request and are
+# evicted LRU beyond MODEL_MEMORY_BUDGET_MB. Without REGIONS_CONFIG only Delhi is served.
+model_registry = ModelRegistry.from_config(
+    os.getenv("REGIONS_CONFIG") or None,
+    _project_root,
+    default_csv=os.path.join(_project_root, "crime.csv"),
+    default_artifact=MODEL_ARTIFACT_PATH or None,
+    watch_interval_s=float(os.getenv("MODEL_WATCH_INTERVAL_S", "5")),
+    memory_budget_bytes=int(float(os.getenv("MODEL_MEMORY_BUDGET_MB", "512")) * 2 ** 20),
+)
+
+# Holds the default region's snapshot; reloads swap in a new snapshot atomically
+model_manager = model_registry.default.manager
+
+# Scored routes per snapped O/D pair (stale-while-revalidate). Entries are tagged with the
+# version of their region's model; a newer model re-scores the cached geometry locally.
+route_cache = RouteCache(
+    max_entries=int(os.getenv("ROUTE_CACHE_SIZE", "512")),
+    ttl_s=float(os.getenv("ROUTE_CACHE_TTL_S", "300")),
+    max_stale_s=float(os.getenv("ROUTE_CACHE_MAX_STALE_S", "86400")),
+)
+
+# Rendered risk heatmap tiles (optionally persisted to HEATMAP_TILE_DIR)
+heatmap_tiles = HeatmapTileCache(
+    max_entries=int(os.getenv("HEATMAP_CACHE_SIZE", "2048")),
+    disk_dir=os.getenv("HEATMAP_TILE_DIR") or None,
+)
+model_manager.add_swap_listener(heatmap_tiles.clear)
+HEATMAP_CACHE_CONTROL = f"public, max-age={int(os.getenv('HEATMAP_MAX_AGE_S', '3600'))}"
+
+# /safest-route work is cancelled when the client disconnects or this deadline passes
+# (SafetyRoutes.jsx gives up after 10 s, so later results would never be read)
+ROUTE_DEADLINE_S = float(os.getenv("ROUTE_DEADLINE_S", "10"))
+ROUTE_DISCONNECT_POLL_S = float(os.getenv("ROUTE_DISCONNECT_POLL_S", "0.25"))
+route_cancellations = {"client_disconnected": 0, "deadline_exceeded": 0}
+
+# Police stations, hospitals and public places returned by /sos (loaded at startup)
+SAFE_HAVENS_PATH = os.getenv("SAFE_HAVENS_PATH") or os.path.join(_project_root, "safe_havens.csv")
+safe_havens = SafeHavenIndex([], [], [], [])
 
-# Global ML service instance (loaded once on startup)
-ml_service: MLModelService = None
+
+# Seconds clients are told to wait (Retry-After) while the model is warming up
+MODEL_WARMUP_RETRY_AFTER_S = os.getenv("MODEL_WARMUP_RETRY_AFTER_S", "5")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Load ML model and crime data on server startup.
-    This ensures the model is ready before handling requests.
+    Start serving immediately and build the ML model in the background.
+    
+    Liveness, /sos and /send-sms work from the first request; endpoints that need
+    the model return 503 with Retry-After until readiness turns true.
     """
     # Startup
-    global ml_service
-    try:
-        # Get the root directory (parent of backend)
-        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        crime_csv_path = os.path.join(root_dir, "crime.csv")
-        
-        print(f"[Backend] Loading ML model from: {crime_csv_path}")
-        ml_service = MLModelService(crime_csv_path)
-        print(f"[Backend] ML model loaded successfully!")
-        print(f"[Backend] Crime data points: {len(ml_service.crime_coords)}")
-        print(f"[Backend] Clusters: {ml_service.kmeans_model.n_clusters}")
-    except Exception as e:
-        print(f"[Backend] ERROR loading ML model: {e}")
-        raise
+    global safe_havens
+    # Small file, loaded before serving so /sos never waits on I/O
+    safe_havens = SafeHavenIndex.from_csv(SAFE_HAVENS_PATH)
+
+    logger.info(f"Warming up ML model in background from: {model_manager.crime_csv_path}")
+    warm_task = asyncio.create_task(model_manager.warm_up())
+    warm_task.add_done_callback(_log_model_ready)
+    
+    # Reload the model in the background whenever crime.csv changes
+    watch_task = asyncio.create_task(model_manager.watch())
     
     yield
     
-    # Shutdown (if needed)
-    pass
+    # Shutdown
+    warm_task.cancel()
+    watch_task.cancel()
+
+
+def _log_model_ready(task: asyncio.Task):
+    """Log model stats once the background warm-up finishes."""
+    if task.cancelled() or task.exception() is not None:
+        return
+    ml_service = model_manager.service
+    logger.info(f"ML model loaded successfully! Crime data points: {len(ml_service.crime_points)}, "
+                f"clusters: {ml_service.n_clusters}")
+
+
+def _require_model():
+    """Return the current ML service snapshot, or a fast 503 while it is warming up."""
+    ml_service = model_manager.service
+    if ml_service is None:
+        raise HTTPException(
+            status_code=503,
+            detail="ML model is warming up, please retry shortly",
+            headers={"Retry-After": MODEL_WARMUP_RETRY_AFTER_S}
+        )
+    return ml_service
+
+
+async def _require_region_model(region):
+    """
+    Return the snapshot serving a region, loading it on first use.
+    
+    The default region answers 503 while warming up like _require_model();
+    other regions are loaded on demand and answer 503 if that fails.
+    """
+    if region is model_registry.default:
+        return _require_model()
+    try:
+        return await model_registry.acquire(region)
+    except Exception as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model for region {region.name} is unavailable: {str(e)}",
+            headers={"Retry-After": MODEL_WARMUP_RETRY_AFTER_S}
+        )
 
 
 # Initialize FastAPI app with lifespan
@@ -72,6 +172,44 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Admission control: emergency endpoints get a reserved lane that is never limited,
+# while routing/heatmap/admin traffic is capped and shed early with 429/503.
+emergency_lane = Lane("emergency", reserved=True)
+admission = AdmissionController(
+    routes=[
+        ("/sos", emergency_lane),
+        ("/send-sms", emergency_lane),
+        ("/health/", Lane("health", reserved=True)),
+        ("/safest-route", Lane(
+            "routing",
+            max_concurrency=int(os.getenv("ROUTE_MAX_CONCURRENCY", "8")),
+            rate_per_min=float(os.getenv("ROUTE_RATE_PER_MIN", "30")),
+            burst=float(os.getenv("ROUTE_BURST", "10")),
+        )),
+        ("/heatmap/", Lane(
+            "heatmap",
+            max_concurrency=int(os.getenv("HEATMAP_MAX_CONCURRENCY", "8")),
+            rate_per_min=float(os.getenv("HEATMAP_RATE_PER_MIN", "600")),
+            burst=float(os.getenv("HEATMAP_BURST", "200")),
+        )),
+        ("/admin/", Lane("admin", max_concurrency=2)),
+    ],
+    default_lane=Lane("default"),
+    trusted_proxy_hops=int(os.getenv("ADMISSION_TRUSTED_PROXY_HOPS", "0")),
+)
+# Added before CORS so CORS wraps it and 429/503 rejections still carry CORS headers
+app.add_middleware(AdmissionControlMiddleware, controller=admission)
+
+# Profiles of single requests tagged with X-Profile (see ProfilingMiddleware)
+profile_store = ProfileStore(max_entries=int(os.getenv("PROFILE_STORE_SIZE", "20")))
+MAX_PROFILE_SECONDS = float(os.getenv("MAX_PROFILE_SECONDS", "60"))
+
+
+def _is_admin_token(token: Optional[str]) -> bool:
+    """True if token matches the configured admin token."""
+    return bool(ADMIN_TOKEN and token and secrets.compare_digest(token, ADMIN_TOKEN))
+
+
 # Configure CORS to allow frontend requests
 app.add_middleware(
     CORSMiddleware,
@@ -88,11 +226,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request profiling (X-Profile + X-Admin-Token); outermost so it covers the whole request
+app.add_middleware(ProfilingMiddleware, store=profile_store, is_admin=_is_admin_token)
+
 # Request/Response Models
 class RouteRequest(BaseModel):
     """Request model for safest route endpoint"""
     start: List[float]  # [lat, lng]
     end: List[float]    # [lat, lng]
+    departure_time: Optional[datetime] = None  # Departure time (UTC offset or local) for time-of-day risk
 
 class RouteOption(BaseModel):
     """Individual route option with metadata"""
@@ -105,17 +247,30 @@ class RouteResponse(BaseModel):
     """Response model for safest route endpoint"""
     safest_route: RouteOption  # The route with highest safety score
     all_routes: List[RouteOption]  # All available routes with scores
+    departure_hour_of_week: Optional[int] = None  # Set when time-of-day risk was applied
 
 class SOSRequest(BaseModel):
     """Request model for SOS endpoint"""
     location: List[float]  # [lat, lng]
     timestamp: str = None
+    k: int = 3  # Number of nearby safe havens to return
+    categories: Optional[List[str]] = None  # e.g. ["police", "hospital"]; None = all
+    include_risk: bool = False  # Add crime risk along the straight-line approach
+
+class SafeHaven(BaseModel):
+    """A nearby place to head for in an emergency"""
+    name: str
+    category: str  # police, hospital or public_place
+    location: List[float]  # [lat, lng]
+    distance_km: float
+    approach_risk: Optional[float] = None  # Only when requested and the model is ready
 
 class SOSResponse(BaseModel):
     """Response model for SOS endpoint"""
     status: str
     message: str
     location: List[float]
+    nearby_havens: List[SafeHaven] = []
 
 class SMSRequest(BaseModel):
     """Request model for SMS endpoint"""
@@ -132,28 +287,256 @@ class SMSResponse(BaseModel):
     failed_count: int
 
 
+class ReloadResponse(BaseModel):
+    """Response model for model reload endpoint"""
+    status: str
+    version: int
+    crime_data_points: int
+
+
+class CrimeRowsRequest(BaseModel):
+    """Request model for incremental crime data updates"""
+    rows: List[Dict[str, Any]]  # Rows keyed by crime.csv column names
+
+class CrimeRowsResponse(BaseModel):
+    """Response model for incremental crime data updates"""
+    status: str
+    version: int
+    added: int
+    updated: int
+    crime_data_points: int
+
+
+def _require_admin(token: Optional[str]):
+    """Reject the request unless it carries the configured admin token."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if not _is_admin_token(token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
 @app.get("/")
 async def root():
-    """Health check endpoint"""
+    """Health check endpoint (liveness: always ok while the process is serving)"""
     return {
         "status": "ok",
         "service": "SafarSaheli Backend API",
-        "ml_model_loaded": ml_service is not None
+        "ml_model_loaded": model_manager.ready
     }
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and the event loop is responsive."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness(response: Response):
+    """Readiness probe: 200 once the ML model is loaded, 503 while warming up."""
+    if not model_manager.ready:
+        response.status_code = 503
+        response.headers["Retry-After"] = MODEL_WARMUP_RETRY_AFTER_S
+        return {"status": "warming_up", "error": model_manager.last_reload_error}
+    return {"status": "ready", "model_version": model_manager.version}
+
+
 @app.get("/health")
 async def health():
     """Detailed health check"""
+    ml_service = model_manager.service
     return {
-        "status": "healthy",
+        "status": "healthy" if ml_service is not None else "warming_up",
         "ml_model_loaded": ml_service is not None,
-        "crime_data_points": len(ml_service.crime_coords) if ml_service else 0
+        "crime_data_points": len(ml_service.crime_points) if ml_service else 0,
+        "model_version": model_manager.version,
+        "resident_regions": [r.name for r in model_registry.regions if r.manager.ready],
+        "cached_routes": len(route_cache)
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Operational counters: admission, upstream quota usage, model regions, cache sizes and logging."""
+    return {
+        "admission": admission.stats(),
+        "models": model_registry.stats(),
+        "upstream": {"geoapify": {**geoapify_governor.stats(), "circuit": geoapify_breaker.stats()}},
+        "route_cache": {"entries": len(route_cache)},
+        "route_cancellations": dict(route_cancellations),
+        "heatmap_tiles": {"rendered": heatmap_tiles.rendered, "cache_hits": heatmap_tiles.hits},
+        "logging": logging_stats(),
     }
 
 
+async def _compute_safest_route(
+    ml_service,
+    start_lat: float,
+    start_lng: float,
+    end_lat: float,
+    end_lng: float,
+    departure_hour: Optional[int] = None,
+    priority: int = PRIORITY_PRIMARY
+) -> RouteResponse:
+    """
+    Fetch route options from Geoapify and score them with one model snapshot.
+    
+    departure_hour (hour of week) selects the time-of-day risk slice, if any;
+    priority is the Geoapify governor priority of the fetch.
+    
+    Raises:
+        HTTPException: 404 if Geoapify returned no routes
+        UpstreamError: If Geoapify is rate limited, failing, or its circuit is open
+    """
+    # Get multiple route options from Geoapify
+    with span("get_route_options"):
+        routes = await ml_service.get_route_options(start_lat, start_lng, end_lat, end_lng, priority)
+    
+    if not routes:
+        raise HTTPException(status_code=404, detail="No routes found")
+    
+    return await _score_routes(ml_service, routes, departure_hour)
+
+
+async def _score_routes(ml_service, routes: List[Dict], departure_hour: Optional[int] = None) -> RouteResponse:
+    """
+    Score route options with one model snapshot and rank them, safest first.
+    
+    Args:
+        routes: Dicts with (N, 2) "coordinates" arrays, distance_km and duration_min
+    """
+    # Score each route using ML model (coordinates stay numpy arrays until the response).
+    # Yield between routes so a cancelled request stops scoring early.
+    safety_scores = []
+    with span("score_route_safety"):
+        for route in routes:
+            safety_scores.append(ml_service.score_route_safety(route["coordinates"], departure_hour))
+            await asyncio.sleep(0)
+    
+    with span("build response models"):
+        scored_routes = [
+            RouteOption(
+                route=route["coordinates"].tolist(),
+                safety_score=safety_score,
+                distance_km=route.get("distance_km", 0),
+                duration_min=route.get("duration_min", 0)
+            )
+            for route, safety_score in zip(routes, safety_scores)
+        ]
+    
+    # Sort routes by safety score (highest first)
+    scored_routes.sort(key=lambda r: r.safety_score, reverse=True)
+    
+    # Select route with highest safety score (lowest risk)
+    return RouteResponse(
+        safest_route=scored_routes[0],
+        all_routes=scored_routes,
+        departure_hour_of_week=departure_hour
+    )
+
+
+async def _rescore_cached_route(ml_service, cached: RouteResponse, departure_hour: Optional[int]) -> RouteResponse:
+    """Re-score a cached response's route geometry with a newer model (no Geoapify calls)."""
+    routes = [
+        {
+            "coordinates": np.asarray(option.route, dtype=float),
+            "distance_km": option.distance_km,
+            "duration_min": option.duration_min,
+        }
+        for option in cached.all_routes
+    ]
+    return await _score_routes(ml_service, routes, departure_hour)
+
+
+async def _run_request_scoped(work, http_request: Request, deadline_s: float = ROUTE_DEADLINE_S):
+    """
+    Run a coroutine for one request and cancel it if the request is abandoned.
+    
+    The work runs as its own task while the handler polls for a client
+    disconnect; on disconnect or after deadline_s the task is cancelled, which
+    aborts in-flight Geoapify calls and any scoring not yet done.
+    
+    Args:
+        work: Coroutine computing the response
+        http_request: The request the work belongs to
+        deadline_s: Seconds the work may take
+    
+    Returns:
+        The coroutine's result (its exceptions propagate unchanged)
+    
+    Raises:
+        HTTPException: 504 when the deadline passes, 499 when the client disconnected
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_s
+    task = asyncio.create_task(work)
+    reason = None
+    try:
+        while reason is None:
+            timeout = max(0.0, min(ROUTE_DISCONNECT_POLL_S, deadline - loop.time()))
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            if loop.time() >= deadline:
+                reason = "deadline_exceeded"
+            elif await http_request.is_disconnected():
+                reason = "client_disconnected"
+    finally:
+        # Also reached when the handler itself is cancelled (e.g. server shutdown)
+        if not task.done():
+            task.cancel()
+    
+    route_cancellations[reason] += 1
+    logger.info(f"Cancelled {http_request.url.path} work: {reason.replace('_', ' ')}")
+    if reason == "deadline_exceeded":
+        raise HTTPException(status_code=504, detail=f"Route computation exceeded {deadline_s:g}s")
+    raise HTTPException(status_code=499, detail="Client closed request")
+
+
+# Strong references to background refresh tasks (asyncio only keeps weak ones)
+_background_tasks = set()
+
+
+async def _refresh_cached_route(
+    region, cache_key, start_lat: float, start_lng: float, end_lat: float, end_lng: float,
+    departure_hour: Optional[int] = None
+):
+    """
+    Refetch an expired cached route and store it scored by the region's current model.
+    
+    The fetch runs at fallback priority, so it only uses Geoapify budget that
+    live requests leave spare; when there is none the stale entry keeps serving.
+    """
+    try:
+        ml_service = await _require_region_model(region)
+        model_version = region.manager.version
+        response = await _compute_safest_route(
+            ml_service, start_lat, start_lng, end_lat, end_lng, departure_hour, PRIORITY_FALLBACK
+        )
+        route_cache.put(cache_key, model_version, response)
+    except Exception as e:
+        # Keep serving the stale entry; the next hit will try again
+        logger.warning(f"Background route refresh failed: {e}")
+    finally:
+        route_cache.end_refresh(cache_key)
+
+
+def _schedule_route_refresh(
+    region, cache_key, start_lat: float, start_lng: float, end_lat: float, end_lng: float,
+    departure_hour: Optional[int] = None
+):
+    """Start a background refresh for an expired route unless one is already running."""
+    if not route_cache.begin_refresh(cache_key):
+        return
+    task = asyncio.create_task(
+        _refresh_cached_route(region, cache_key, start_lat, start_lng, end_lat, end_lng, departure_hour)
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
 @app.post("/safest-route", response_model=RouteResponse)
-async def get_safest_route(request: RouteRequest):
+async def get_safest_route(request: RouteRequest, response: Response, http_request: Request):
     """
     Find the safest route between start and end coordinates.
     
@@ -162,63 +545,251 @@ async def get_safest_route(request: RouteRequest):
     2. Score each route based on proximity to high-risk crime clusters
     3. Return the route with the lowest cumulative risk score
     
+    Results are cached per snapped start/end pair. An entry scored by an older
+    model is re-scored locally from its cached geometry; an entry past its TTL
+    is returned immediately and refetched in the background. The X-Route-Cache
+    header reports fresh, rescored, stale or miss.
+    
+    Each request is scored by the model of the region containing its endpoints
+    (see model_registry.py); the X-Model-Region header names it.
+    
+    If the client disconnects, or the work takes longer than ROUTE_DEADLINE_S
+    (504), the Geoapify calls and scoring for this request are cancelled.
+    Background refreshes of stale cache entries are never cancelled.
+    
     Args:
         request: RouteRequest with start [lat, lng] and end [lat, lng]
     
     Returns:
         RouteResponse with safest route coordinates and metadata
     """
-    if ml_service is None:
-        raise HTTPException(status_code=503, detail="ML model not loaded")
-    
     if len(request.start) != 2 or len(request.end) != 2:
         raise HTTPException(status_code=400, detail="Invalid coordinates format")
     
     start_lat, start_lng = request.start[0], request.start[1]
     end_lat, end_lng = request.end[0], request.end[1]
     
-    # NOTE: Model is trained on Delhi crime data, so scoring will be most accurate for Delhi region
-    # Coordinate validation removed to allow other cities, but accuracy may be limited
-    # For Delhi: ~28.4-28.9 lat, 76.8-77.4 lng
-    # For best results, use coordinates within Delhi region
+    # Coordinates outside every configured region are scored by the default (Delhi)
+    # model, so accuracy may be limited there
+    region = model_registry.region_for(start_lat, start_lng, end_lat, end_lng)
+    
+    # Pin the current snapshot so a concurrent reload cannot change the model mid-request
+    ml_service = await _require_region_model(region)
+    model_version = region.manager.version
+    response.headers["X-Model-Region"] = region.name
+    
+    if not GEOAPIFY_API_KEY:
+        raise HTTPException(status_code=503, detail=GEOAPIFY_KEY_MISSING_MESSAGE)
+    
+    # Time-of-day risk only applies when the region's model has a risk cube
+    departure_hour = None
+    if request.departure_time is not None and ml_service.risk_cube is not None:
+        departure_hour = hour_of_week(request.departure_time, region.tz)
+    
+    cache_key = route_cache.key(
+        start_lat, start_lng, end_lat, end_lng, region=region.name, hour=departure_hour
+    )
+    cached, cache_state = route_cache.lookup(cache_key, model_version)
+    if cached is not None:
+        header = cache_state
+        if cache_state == RESCORE:
+            # The geometry is still good; only the scores depend on the model
+            cached = await _rescore_cached_route(ml_service, cached, departure_hour)
+            cache_state = route_cache.rescored(cache_key, model_version, cached)
+            header = "rescored" if cache_state != STALE else STALE
+        if cache_state == STALE:
+            _schedule_route_refresh(
+                region, cache_key, start_lat, start_lng, end_lat, end_lng, departure_hour
+            )
+        response.headers["X-Route-Cache"] = header
+        return cached
     
     try:
-        # Get multiple route options from Geoapify
-        routes = await ml_service.get_route_options(start_lat, start_lng, end_lat, end_lng)
-        
-        if not routes:
-            raise HTTPException(status_code=404, detail="No routes found")
-        
-        # Score each route using ML model
-        scored_routes = []
-        for route in routes:
-            safety_score = ml_service.score_route_safety(route["coordinates"])
-            scored_routes.append(RouteOption(
-                route=route["coordinates"],
-                safety_score=safety_score,
-                distance_km=route.get("distance_km", 0),
-                duration_min=route.get("duration_min", 0)
-            ))
-        
-        # Sort routes by safety score (highest first)
-        scored_routes.sort(key=lambda r: r.safety_score, reverse=True)
-        
-        # Select route with highest safety score (lowest risk)
-        safest_route = scored_routes[0] if scored_routes else None
-        
-        if not safest_route:
-            raise HTTPException(status_code=404, detail="No routes found")
-        
-        return RouteResponse(
-            safest_route=safest_route,
-            all_routes=scored_routes
+        result = await _run_request_scoped(
+            _compute_safest_route(ml_service, start_lat, start_lng, end_lat, end_lng, departure_hour),
+            http_request
+        )
+    except UpstreamError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(int(math.ceil(e.retry_after_s)))}
         )
-        
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[Backend] Error in /safest-route: {e}")
+        logger.exception(f"Error in /safest-route: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    route_cache.put(cache_key, model_version, result)
+    response.headers["X-Route-Cache"] = "miss"
+    return result
+
+
+@app.get("/heatmap/{z}/{x}/{y}.png")
+async def get_heatmap_tile(z: int, x: int, y: int, if_none_match: Optional[str] = Header(default=None)):
+    """
+    Serve a 256x256 PNG risk heatmap tile (Web Mercator z/x/y, like OSM tiles).
+    
+    Tiles are rendered once per model snapshot from the same risk field used to
+    score routes, then served from cache with an ETag and Cache-Control so
+    browsers and CDNs can revalidate cheaply.
+    
+    Args:
+        z, x, y: Tile coordinates
+        if_none_match: ETag from a previous response (returns 304 if unchanged)
+    
+    Returns:
+        PNG image
+    """
+    if not 0 <= z <= MAX_ZOOM or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    
+    # Tiles are drawn from the model of the region under the tile's center
+    south, west, north, east = tile_bounds(z, x, y)
+    ml_service = await _require_region_model(
+        model_registry.region_at((south + north) / 2, (west + east) / 2)
+    )
+    
+    fingerprint = heatmap_tiles.fingerprint(ml_service)
+    etag = heatmap_tiles.etag(fingerprint, z, x, y)
+    headers = {"ETag": etag, "Cache-Control": HEATMAP_CACHE_CONTROL}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    
+    tile, etag = await heatmap_tiles.get_tile(ml_service, z, x, y)
+    headers["ETag"] = etag
+    return Response(content=tile, media_type="image/png", headers=headers)
+
+
+@app.post("/admin/reload-model", response_model=ReloadResponse)
+async def reload_model(region: Optional[str] = None, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Rebuild the ML model from crime.csv and swap it in without downtime.
+    
+    The new snapshot is built in a worker thread; requests keep being served
+    by the current model until the swap, and cached routes are invalidated.
+    
+    Requires the X-Admin-Token header to match the ADMIN_TOKEN environment variable.
+    
+    Args:
+        region: Region to reload (defaults to the default region)
+    
+    Returns:
+        ReloadResponse with the new model version
+    """
+    _require_admin(x_admin_token)
+    
+    target = model_registry.by_name.get(region) if region else model_registry.default
+    if target is None:
+        raise HTTPException(status_code=404, detail=f"Unknown region: {region}")
+    
+    try:
+        version = await target.manager.reload(reason="admin request")
+        if target is not model_registry.default:
+            # Track the reloaded region as resident so the memory budget applies
+            await model_registry.acquire(target)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+    
+    return ReloadResponse(
+        status="reloaded",
+        version=version,
+        crime_data_points=len(target.manager.service.crime_points)
+    )
+
+
+@app.post("/admin/crime-rows", response_model=CrimeRowsResponse)
+async def ingest_crime_rows(request: CrimeRowsRequest, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Add or update crime rows without retraining the KMeans model.
+    
+    Rows use the crime.csv column names; a row for an existing area replaces it.
+    Requires the X-Admin-Token header to match the ADMIN_TOKEN environment variable.
+    
+    Args:
+        request: CrimeRowsRequest with the rows to apply
+    
+    Returns:
+        CrimeRowsResponse with added/updated counts and the new model version
+    """
+    _require_admin(x_admin_token)
+    
+    try:
+        result = await model_manager.ingest(request.rows)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid crime rows: {str(e)}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return CrimeRowsResponse(
+        status="updated",
+        version=model_manager.version,
+        added=result["added"],
+        updated=result["updated"],
+        crime_data_points=len(model_manager.service.crime_points)
+    )
+
+
+@app.post("/admin/profile")
+async def profile_server(
+    seconds: float = 10.0,
+    interval_ms: float = 5.0,
+    x_admin_token: Optional[str] = Header(default=None)
+):
+    """
+    Sample every thread's stack for a number of seconds and return the profile.
+    
+    The result is a speedscope file (open it at https://www.speedscope.app);
+    the server keeps serving normally while it is captured.
+    Requires the X-Admin-Token header to match the ADMIN_TOKEN environment variable.
+    
+    Args:
+        seconds: How long to sample (up to MAX_PROFILE_SECONDS)
+        interval_ms: Milliseconds between samples
+    
+    Returns:
+        speedscope JSON document
+    """
+    _require_admin(x_admin_token)
+    
+    if not 0 < seconds <= MAX_PROFILE_SECONDS or not 1 <= interval_ms <= 1000:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS:g}] and interval_ms in [1, 1000]"
+        )
+    
+    try:
+        profile = await profile_for(seconds, interval_ms / 1000.0)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return JSONResponse(
+        profile,
+        headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'}
+    )
+
+
+@app.get("/admin/profiles/{profile_id}")
+async def get_request_profile(profile_id: str, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Download the profile of a single request.
+    
+    Send any request with an `X-Profile: 1` header and a valid X-Admin-Token;
+    its response carries an X-Profile-Id header naming the profile to fetch here.
+    
+    Returns:
+        speedscope JSON document
+    """
+    _require_admin(x_admin_token)
+    
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have expired)")
+    return JSONResponse(
+        profile,
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'}
+    )
 
 
 @app.post("/sos", response_model=SOSResponse)
@@ -232,11 +803,14 @@ async def trigger_sos(request: SOSRequest):
     - Track location continuously
     - Log incident for safety records
     
+    The nearest safe havens come from the local index loaded at startup, so
+    the response never depends on a network call.
+    
     Args:
         request: SOSRequest with current location [lat, lng]
     
     Returns:
-        SOSResponse confirming SOS activation
+        SOSResponse confirming SOS activation, with the k nearest safe havens
     """
     if len(request.location) != 2:
         raise HTTPException(status_code=400, detail="Invalid location format")
@@ -244,15 +818,24 @@ async def trigger_sos(request: SOSRequest):
     lat, lng = request.location[0], request.location[1]
     
     # Mock SOS processing
-    print(f"[SOS] Emergency triggered at location: {lat}, {lng}")
-    print(f"[SOS] Timestamp: {request.timestamp or 'N/A'}")
-    print(f"[SOS] Alert sent to emergency contacts")
-    print(f"[SOS] Nearby authorities notified")
+    sos_logger.warning(
+        "Emergency triggered; alert sent to emergency contacts, nearby authorities notified",
+        extra={"lat": lat, "lng": lng, "timestamp": request.timestamp or "N/A"}
+    )
+    
+    havens = safe_havens.nearest(lat, lng, k=max(0, min(request.k, 20)), categories=request.categories)
+    
+    # Approach risk is best effort: skipped while the local region's model is not loaded
+    ml_service = model_registry.region_at(lat, lng).manager.service
+    if request.include_risk and ml_service is not None:
+        for haven in havens:
+            haven["approach_risk"] = approach_risk(ml_service, lat, lng, *haven["location"])
     
     return SOSResponse(
         status="activated",
         message="SOS alert sent successfully. Help is on the way.",
-        location=[lat, lng]
+        location=[lat, lng],
+        nearby_havens=havens
     )
 
 
@@ -300,7 +883,8 @@ async def send_sms(request: SMSRequest):
         raise HTTPException(status_code=400, detail="Message cannot be empty")
     
     try:
-        # Initialize Twilio client
+        # Initialize Twilio client (imported on first use to keep startup light)
+        from twilio.rest import Client
         client = Client(account_sid, auth_token)
         
         sent_count = 0
@@ -346,13 +930,13 @@ async def send_sms(request: SMSRequest):
                 )
                 
                 sent_count += 1
-                print(f"[SMS] Sent to {formatted_number}: {message.sid}")
+                sms_logger.info(f"Sent to {formatted_number}: {message.sid}")
                 
             except Exception as e:
                 failed_count += 1
                 error_msg = f"Failed to send to {phone_number}: {str(e)}"
                 errors.append(error_msg)
-                print(f"[SMS] Error: {error_msg}")
+                sms_logger.error(error_msg)
         
         # Build response message
         if sent_count > 0 and failed_count == 0:
@@ -370,7 +954,7 @@ async def send_sms(request: SMSRequest):
         )
         
     except Exception as e:
-        print(f"[SMS] Twilio error: {e}")
+        sms_logger.error(f"Twilio error: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to send SMS: {str(e)}"
@@ -379,5 +963,6 @@ async def send_sms(request: SMSRequest):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # log_config=None keeps uvicorn's loggers on the buffered handler set up by app_logging
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
 
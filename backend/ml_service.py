@@ -6,16 +6,38 @@ It loads crime data, trains/loads the KMeans model, and provides methods to scor
 routes based on proximity to high-risk crime clusters.
 """
 
-import pandas as pd
+# pandas and scikit-learn are imported lazily: they are only needed to build the
+# model from CSV, not to score routes from a prebuilt artifact.
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+import asyncio
 import os
+import json
+import hashlib
+import logging
 import aiohttp
 from typing import List, Tuple, Dict, Optional
-import math
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 
+try:
+    # Faster JSON decoding of Geoapify responses; stdlib json is the fallback
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+from app_logging import get_logger, should_sample
+from data_sources import count_rows, iter_chunks, read_column_names
+from incident_grid import aggregate_incident_cells, cell_area_km2
+from profiler import span
+from risk_cube import DEFAULT_TIMEZONE, RiskCube
+from upstream import (
+    BreakerPermit, geoapify_breaker, geoapify_governor, PRIORITY_PRIMARY, PRIORITY_FALLBACK,
+    UpstreamBusyError, UpstreamUnavailableError
+)
+
+logger = get_logger("ml_service")
+score_logger = get_logger("ml_score")
+
 _backend_dir = os.path.dirname(os.path.abspath(__file__))
 _project_root = os.path.dirname(_backend_dir)
 load_dotenv(os.path.join(_backend_dir, ".env"))
@@ -24,11 +46,158 @@ load_dotenv(os.path.join(_project_root, ".env"))
 # Geoapify: backend GEOAPIFY_API_KEY or Vite-style key in root .env
 GEOAPIFY_API_KEY = os.getenv("GEOAPIFY_API_KEY") or os.getenv("VITE_GEOAPIFY_API_KEY")
 
+GEOAPIFY_KEY_MISSING_MESSAGE = (
+    "Geoapify API key missing. Set GEOAPIFY_API_KEY in backend/.env "
+    "or VITE_GEOAPIFY_API_KEY in the project root .env"
+)
+
 if not GEOAPIFY_API_KEY:
-    raise ValueError(
-        "Geoapify API key missing. Set GEOAPIFY_API_KEY in backend/.env "
-        "or VITE_GEOAPIFY_API_KEY in the project root .env"
-    )
+    # Checked again when routes are requested; the model and SOS endpoints work without it
+    logger.warning(GEOAPIFY_KEY_MISSING_MESSAGE)
+
+GEOAPIFY_ROUTING_URL = os.getenv("GEOAPIFY_ROUTING_URL", "https://api.geoapify.com/v1/routing")
+
+# Per-call timeouts, so a slow provider costs seconds rather than aiohttp's 5-minute default
+GEOAPIFY_TIMEOUT = aiohttp.ClientTimeout(
+    total=float(os.getenv("GEOAPIFY_TIMEOUT_S", "4")),
+    connect=float(os.getenv("GEOAPIFY_CONNECT_TIMEOUT_S", "2"))
+)
+
+# Prebuilt model artifact (see MLModelService.save_artifact); skips pandas/sklearn at startup
+MODEL_ARTIFACT_PATH = os.getenv(
+    "MODEL_ARTIFACT_PATH",
+    os.path.join(_project_root, "artifacts", "crime_model.npz")
+)
+ARTIFACT_FORMAT_VERSION = 2
+
+# Output of the KMeans.py model-selection sweep; falls back to DEFAULT_N_CLUSTERS if absent
+KMEANS_SELECTION_PATH = os.getenv(
+    "KMEANS_SELECTION_PATH",
+    os.path.join(_project_root, "artifacts", "kmeans_selection.json")
+)
+DEFAULT_N_CLUSTERS = 6
+
+# Search radius for nearby crime data when computing the risk field
+RISK_RADIUS_KM = 5.0
+
+# Bound on (points x crime points) evaluated at once by point_risks
+RISK_FIELD_CHUNK_ELEMENTS = 1_000_000
+
+# Crime feature columns used for clustering:
+# 1: murder, 2: rape, 3: gangrape, 4: robbery, 5: theft, 6: assault murders, 7: sexual harassment, 12: crime/area
+CRIME_FEATURE_COLUMNS = [1, 2, 3, 4, 5, 6, 7, 12]
+
+# Per-category count columns among them (all but crime/area), which incident feeds are binned into
+CRIME_CATEGORY_COLUMNS = CRIME_FEATURE_COLUMNS[:-1]
+
+# Area name prefix of data points aggregated from the incidents feed
+INCIDENT_CELL_PREFIX = "incident cell "
+
+# Risk weight per feature column (higher weight for violent crimes)
+CRIME_RISK_WEIGHTS = np.array([10, 8, 10, 3, 1, 5, 4, 0.1])
+
+
+def _incident_cell_features(
+    centers: np.ndarray,
+    counts: np.ndarray,
+    uncategorized: np.ndarray,
+    area_features: np.ndarray
+) -> np.ndarray:
+    """
+    CRIME_FEATURE_COLUMNS features of incident grid cells, like a crime.csv row.
+    
+    Incidents without a known category are split across categories in the
+    proportions crime.csv reports them; crime/area is incidents per square km.
+    
+    Args:
+        centers: (M, 2) cell centres
+        counts: (M, n_categories) incidents per CRIME_CATEGORY_COLUMNS category
+        uncategorized: (M,) incidents without a known category
+        area_features: crime.csv features the category proportions come from
+    
+    Returns:
+        (M, len(CRIME_FEATURE_COLUMNS)) features
+    """
+    totals = area_features[:, :len(CRIME_CATEGORY_COLUMNS)].sum(axis=0)
+    if totals.sum() > 0:
+        shares = totals / totals.sum()
+    else:
+        shares = np.full(len(CRIME_CATEGORY_COLUMNS), 1.0 / len(CRIME_CATEGORY_COLUMNS))
+    
+    category_counts = counts + uncategorized[:, None] * shares
+    per_km2 = category_counts.sum(axis=1) / cell_area_km2(centers[:, 0])
+    return np.column_stack([category_counts, per_km2])
+
+
+def _compute_risk_scores(crime_features: np.ndarray) -> np.ndarray:
+    """Weighted risk score per row of CRIME_FEATURE_COLUMNS features."""
+    return crime_features @ CRIME_RISK_WEIGHTS
+
+
+def _companion_path(crime_csv_path: str, suffix: str) -> str:
+    """First of <stem><suffix>.parquet, .feather, .arrow or .csv that exists (else .csv)."""
+    stem = os.path.splitext(crime_csv_path)[0] + suffix
+    for ext in (".parquet", ".feather", ".arrow", ".csv"):
+        if os.path.exists(stem + ext):
+            return stem + ext
+    return stem + ".csv"
+
+
+def crime_times_path(crime_csv_path: str) -> str:
+    """
+    Optional time-stamped incidents file next to the crime data
+    (crime.csv -> crime_times.parquet, .feather, .arrow or .csv, first found).
+    """
+    return _companion_path(crime_csv_path, "_times")
+
+
+def crime_incidents_path(crime_csv_path: str) -> str:
+    """
+    Optional undated incidents feed next to the crime data
+    (crime.csv -> crime_incidents.parquet, .feather, .arrow or .csv, first found).
+    """
+    return _companion_path(crime_csv_path, "_incidents")
+
+
+def _source_digest(crime_csv_path: str, timezone: str = DEFAULT_TIMEZONE) -> str:
+    """Hash of the inputs a model is built from (crime data, incidents, timezone + k selection)."""
+    digest = hashlib.sha256(timezone.encode() + b"\0")
+    sources = (crime_csv_path, crime_incidents_path(crime_csv_path), crime_times_path(crime_csv_path),
+               KMEANS_SELECTION_PATH)
+    for path in sources:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _selected_n_clusters(n_samples: int) -> int:
+    """
+    Read the number of clusters chosen by KMeans.py.
+    
+    Args:
+        n_samples: Number of rows being clustered (k cannot exceed it)
+    
+    Returns:
+        Selected k, or DEFAULT_N_CLUSTERS if no usable selection file exists
+    """
+    try:
+        with open(KMEANS_SELECTION_PATH) as f:
+            n_clusters = int(json.load(f)["n_clusters"])
+    except FileNotFoundError:
+        return DEFAULT_N_CLUSTERS
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring invalid k selection in {KMEANS_SELECTION_PATH}: {e}")
+        return DEFAULT_N_CLUSTERS
+    
+    if not 1 <= n_clusters <= n_samples:
+        logger.warning(f"Ignoring out-of-range k selection: {n_clusters}")
+        return DEFAULT_N_CLUSTERS
+    
+    logger.info(f"Using k={n_clusters} from {KMEANS_SELECTION_PATH}")
+    return n_clusters
 
 
 class MLModelService:
@@ -36,147 +205,513 @@ class MLModelService:
     ML Model Service for Crime-Based Route Safety Scoring
     
     This class:
-    1. Loads crime data from CSV
+    1. Loads crime data from CSV (or Parquet/Feather)
     2. Preprocesses data using columns [1,2,3,4,5,6,7,12] (crime features)
-    3. Trains KMeans clustering model (6 clusters as per KMeans.py)
+    3. Trains KMeans clustering model (k selected by KMeans.py, default 6)
     4. Provides route safety scoring based on proximity to high-risk clusters
+    5. Optionally scales risk by time of day from a precomputed risk cube
     """
     
-    def __init__(self, crime_csv_path: str):
+    def __init__(self, crime_csv_path: str, timezone: str = DEFAULT_TIMEZONE):
         """
         Initialize ML service with crime data.
         
         Args:
             crime_csv_path: Path to crime.csv file
+            timezone: IANA timezone incident times are binned in (the region's)
         """
-        self.crime_csv_path = crime_csv_path
-        self.crime_df = None
-        self.crime_coords = []  # List of (lat, lng, risk_score)
-        self.kmeans_model = None
-        self.scaler = None
-        self.cluster_risk_scores = {}  # Map cluster_id -> risk_score
+        self._reset_state(crime_csv_path)
         
         # Load and process data
         self._load_data()
         self._train_model()
         self._compute_cluster_risks()
+        self._build_risk_cube(timezone)
     
-    def _load_data(self):
-        """Load crime data from CSV and extract relevant features"""
-        print(f"[ML Service] Loading crime data from: {self.crime_csv_path}")
-        self.crime_df = pd.read_csv(self.crime_csv_path)
+    def _reset_state(self, crime_csv_path: str):
+        """Initialize all model attributes to their empty values."""
+        self.crime_csv_path = crime_csv_path
+        self.crime_points = np.empty((0, 3))  # (N, 3) array of (lat, lng, risk_score)
+        self.crime_features = None  # (N, 8) array of CRIME_FEATURE_COLUMNS
+        self.cluster_labels = None  # Cluster id per crime data point
+        self.area_names = []  # Area name per crime data point
+        self.area_index = {}  # Map area name -> row index
+        self.columns = []  # crime.csv column names (all of them, for incremental updates)
+        self.kmeans_model = None  # Fitted sklearn model (None when loaded from an artifact)
+        self.scaler = None  # Fitted sklearn scaler (None when loaded from an artifact)
+        self.n_clusters = 0
+        self.cluster_centers = None  # (k, 8) centroids in standardized feature space
+        self.scaler_mean = None  # Feature means used for standardization
+        self.scaler_scale = None  # Feature scales used for standardization
+        self.cluster_risk_scores = {}  # Map cluster_id -> risk_score
+        self.risk_cube = None  # Optional hour-of-week x grid cell RiskCube
+    
+    @classmethod
+    def load(
+        cls,
+        crime_csv_path: str,
+        artifact_path: Optional[str] = None,
+        timezone: str = DEFAULT_TIMEZONE
+    ) -> "MLModelService":
+        """
+        Load the service from a prebuilt artifact if it matches the crime data,
+        otherwise build it from CSV (and refresh the artifact when a path is given).
         
-        # Extract coordinates (columns 10=longitude, 11=latitude)
-        # Extract crime features (columns 1-7: murder, rape, gangrape, robbery, theft, assault murders, sexual harassment)
-        # Column 12: crime/area ratio
+        Args:
+            crime_csv_path: Path to crime.csv file
+            artifact_path: Optional path of the prebuilt .npz artifact
+            timezone: IANA timezone incident times are binned in (the region's)
         
-        for idx in range(len(self.crime_df)):
-            lon = self.crime_df.iloc[idx, 10]  # longitude
-            lat = self.crime_df.iloc[idx, 11]  # latitude
-            
-            # Calculate risk score from crime features
-            murder = self.crime_df.iloc[idx, 1]
-            rape = self.crime_df.iloc[idx, 2]
-            gangrape = self.crime_df.iloc[idx, 3]
-            robbery = self.crime_df.iloc[idx, 4]
-            theft = self.crime_df.iloc[idx, 5]
-            assault = self.crime_df.iloc[idx, 6]
-            harassment = self.crime_df.iloc[idx, 7]
-            crime_area_ratio = self.crime_df.iloc[idx, 12]
+        Returns:
+            Ready-to-use MLModelService
+        """
+        # Artifact-only deployments (e.g. extra regions) ship the .npz without the CSV
+        if artifact_path and os.path.exists(artifact_path) and not os.path.exists(crime_csv_path):
+            return cls.from_artifact(artifact_path, crime_csv_path)
+        
+        source_digest = _source_digest(crime_csv_path, timezone)
+        
+        if artifact_path and os.path.exists(artifact_path):
+            try:
+                service = cls.from_artifact(artifact_path, crime_csv_path)
+                if service.source_digest == source_digest:
+                    return service
+                logger.info(f"Artifact {artifact_path} is stale, rebuilding from CSV")
+            except Exception as e:
+                logger.warning(f"Could not load artifact {artifact_path}: {e}")
+        
+        service = cls(crime_csv_path, timezone)
+        service.source_digest = source_digest
+        if artifact_path:
+            try:
+                service.save_artifact(artifact_path)
+            except OSError as e:
+                logger.warning(f"Could not write artifact {artifact_path}: {e}")
+        return service
+    
+    @classmethod
+    def from_artifact(cls, artifact_path: str, crime_csv_path: Optional[str] = None) -> "MLModelService":
+        """
+        Restore a service saved with save_artifact (no pandas/scikit-learn needed).
+        
+        Args:
+            artifact_path: Path of the .npz artifact
+            crime_csv_path: Crime data path to record on the service
+        
+        Returns:
+            MLModelService with the saved data points, clusters and risks
+        """
+        with np.load(artifact_path, allow_pickle=False) as data:
+            if int(data["format_version"]) != ARTIFACT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported artifact format {int(data['format_version'])}")
             
-            # Weighted risk score (higher weight for violent crimes)
-            risk_score = (
-                murder * 10 +
-                rape * 8 +
-                gangrape * 10 +
-                robbery * 3 +
-                theft * 1 +
-                assault * 5 +
-                harassment * 4 +
-                crime_area_ratio * 0.1
+            service = cls.__new__(cls)
+            service._reset_state(crime_csv_path or str(data["crime_csv_path"]))
+            service.source_digest = str(data["source_digest"])
+            service.columns = data["columns"].tolist()
+            service.area_names = data["area_names"].tolist()
+            service.area_index = {name: idx for idx, name in enumerate(service.area_names)}
+            service.crime_features = data["crime_features"]
+            service.crime_points = np.column_stack([data["lats"], data["lngs"], data["risks"]])
+            service.cluster_labels = data["cluster_labels"]
+            service.cluster_centers = data["cluster_centers"]
+            service.n_clusters = len(service.cluster_centers)
+            service.scaler_mean = data["scaler_mean"]
+            service.scaler_scale = data["scaler_scale"]
+            service._center_counts = data["center_counts"]
+            service._cluster_risk_sums = data["cluster_risk_sums"]
+            service._cluster_risk_counts = data["cluster_risk_counts"]
+            service.risk_cube = RiskCube.from_arrays(data)
+        
+        service._refresh_cluster_risks()
+        logger.info(f"Loaded prebuilt model from {artifact_path} "
+                    f"({len(service.crime_points)} data points, {service.n_clusters} clusters)")
+        return service
+    
+    def save_artifact(self, artifact_path: str):
+        """
+        Save everything needed for scoring and incremental updates to a .npz file.
+        
+        Args:
+            artifact_path: Destination path (written atomically)
+        """
+        points = self.crime_points
+        os.makedirs(os.path.dirname(os.path.abspath(artifact_path)), exist_ok=True)
+        tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                format_version=ARTIFACT_FORMAT_VERSION,
+                source_digest=getattr(self, "source_digest", None) or _source_digest(self.crime_csv_path),
+                crime_csv_path=self.crime_csv_path,
+                columns=np.array(self.columns),
+                area_names=np.array(self.area_names),
+                crime_features=self.crime_features,
+                lats=points[:, 0],
+                lngs=points[:, 1],
+                risks=points[:, 2],
+                cluster_labels=self.cluster_labels,
+                cluster_centers=self.cluster_centers,
+                scaler_mean=self.scaler_mean,
+                scaler_scale=self.scaler_scale,
+                center_counts=self._center_counts,
+                cluster_risk_sums=self._cluster_risk_sums,
+                cluster_risk_counts=self._cluster_risk_counts,
+                **(self.risk_cube.to_arrays() if self.risk_cube is not None else {}),
             )
-            
-            self.crime_coords.append((lat, lon, risk_score))
+        os.replace(tmp_path, artifact_path)
+        logger.info(f"Saved model artifact to {artifact_path}")
+    
+    def approx_memory_bytes(self) -> int:
+        """Rough resident size of this snapshot (arrays plus per-point Python objects)."""
+        arrays = (
+            self.crime_points, self.crime_features, self.cluster_labels, self.cluster_centers,
+            self.scaler_mean, self.scaler_scale,
+        )
+        total = sum(a.nbytes for a in arrays if isinstance(a, np.ndarray))
+        if self.risk_cube is not None:
+            total += self.risk_cube.nbytes
+        # Area names and area_index entries
+        total += len(self.crime_points) * 150
+        return total
+    
+    def _load_data(self):
+        """
+        Load crime data and extract relevant features.
+        
+        Only the columns used for scoring are read (column projection). The file
+        is streamed in chunks of INCIDENT_CHUNK_ROWS rows into arrays sized from
+        its row count up front, so neither the whole table nor per-row Python
+        tuples are ever resident. Cells of an undated incidents feed, if there
+        is one, are appended as extra data points (see _load_incident_cells).
+        """
+        logger.info(f"Loading crime data from: {self.crime_csv_path}")
+        self.columns = read_column_names(self.crime_csv_path)
+        
+        # Column 0: area name, 10: longitude, 11: latitude
+        # Crime features (columns 1-7: murder, rape, gangrape, robbery, theft, assault murders, sexual harassment)
+        # Column 12: crime/area ratio
+        used = [0, 10, 11] + CRIME_FEATURE_COLUMNS
+        n_rows = count_rows(self.crime_csv_path)
+        cells = self._aggregate_incidents()
+        n_cells = len(cells[0]) if cells is not None else 0
+        points = np.empty((n_rows + n_cells, 3))
+        features = np.empty((n_rows + n_cells, len(CRIME_FEATURE_COLUMNS)))
+        area_names = []
+        
+        filled = 0
+        for chunk in iter_chunks(self.crime_csv_path, [self.columns[i] for i in used]):
+            end = filled + len(chunk)
+            if end > n_rows:
+                raise ValueError(f"{self.crime_csv_path} changed while it was being read")
+            area_names.extend(str(name) for name in chunk.iloc[:, 0])
+            points[filled:end, 0] = chunk.iloc[:, 2].to_numpy(dtype=float)  # latitude
+            points[filled:end, 1] = chunk.iloc[:, 1].to_numpy(dtype=float)  # longitude
+            features[filled:end] = chunk.iloc[:, 3:].to_numpy(dtype=float)
+            filled = end
+        if filled != n_rows:
+            raise ValueError(f"{self.crime_csv_path} changed while it was being read")
         
-        print(f"[ML Service] Loaded {len(self.crime_coords)} crime data points")
+        if n_cells:
+            centers, counts, uncategorized = cells
+            points[n_rows:, :2] = centers
+            features[n_rows:] = _incident_cell_features(centers, counts, uncategorized, features[:n_rows])
+            area_names.extend(f"{INCIDENT_CELL_PREFIX}{lat:.4f},{lng:.4f}" for lat, lng in centers)
+        
+        points[:, 2] = _compute_risk_scores(features)
+        self.area_names = area_names
+        self.area_index = {name: idx for idx, name in enumerate(area_names)}
+        self.crime_features = features
+        self.crime_points = points
+        
+        logger.info(f"Loaded {len(self.crime_points)} crime data points ({n_cells} incident cells)")
+    
+    def _aggregate_incidents(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Per-cell counts of the undated incidents feed, or None if there is none."""
+        incidents_path = crime_incidents_path(self.crime_csv_path)
+        if not os.path.exists(incidents_path):
+            return None
+        categories = [self.columns[i] for i in CRIME_CATEGORY_COLUMNS]
+        try:
+            centers, counts, uncategorized, n_incidents = aggregate_incident_cells(incidents_path, categories)
+        except Exception as e:
+            # The feed is optional; a bad incidents file must not fail the model build
+            logger.warning(f"Ignoring invalid incidents in {incidents_path}: {e}")
+            return None
+        logger.info(f"Aggregated {n_incidents} incidents from {incidents_path} into {len(centers)} cells")
+        return centers, counts, uncategorized
     
     def _train_model(self):
         """
         Train KMeans clustering model using crime features.
-        Uses the same approach as KMeans.py (6 clusters, columns [1,2,3,4,5,6,7,12])
+        Uses the same approach as KMeans.py (columns [1,2,3,4,5,6,7,12]); the number
+        of clusters comes from the KMeans.py selection file, defaulting to 6.
         """
-        print("[ML Service] Training KMeans model...")
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.cluster import KMeans
         
-        # Select relevant columns: [1,2,3,4,5,6,7,12]
-        # 1: murder, 2: rape, 3: gangrape, 4: robbery, 5: theft, 6: assault murders, 7: sexual harassment, 12: crime/area
-        cols_to_use = [1, 2, 3, 4, 5, 6, 7, 12]
-        crime_features = self.crime_df.iloc[:, cols_to_use].values
+        logger.info("Training KMeans model...")
         
         # Standardize features
+        # 1: murder, 2: rape, 3: gangrape, 4: robbery, 5: theft, 6: assault murders, 7: sexual harassment, 12: crime/area
         self.scaler = StandardScaler()
-        norm_data = self.scaler.fit_transform(crime_features)
+        norm_data = self.scaler.fit_transform(self.crime_features)
         
-        # Train KMeans with 6 clusters (as per KMeans.py)
-        n_clusters = 6
+        # Train KMeans with the k selected by KMeans.py (6 if no selection exists)
+        n_clusters = _selected_n_clusters(len(norm_data))
         self.kmeans_model = KMeans(
             n_clusters=n_clusters,
             init='k-means++',
             n_init='auto',
             random_state=42
         )
-        cluster_labels = self.kmeans_model.fit_predict(norm_data)
+        self.cluster_labels = self.kmeans_model.fit_predict(norm_data)
+        
+        # Plain arrays used for scoring-time cluster assignment (no sklearn needed)
+        self.n_clusters = n_clusters
+        self.cluster_centers = self.kmeans_model.cluster_centers_.copy()
+        self.scaler_mean = self.scaler.mean_.copy()
+        self.scaler_scale = self.scaler.scale_.copy()
+        
+        # Per-cluster observation counts drive the incremental centroid updates
+        self._center_counts = np.bincount(self.cluster_labels, minlength=n_clusters).astype(float)
         
-        print(f"[ML Service] KMeans model trained with {n_clusters} clusters")
-        print(f"[ML Service] Cluster distribution: {np.bincount(cluster_labels)}")
+        logger.info(f"KMeans model trained with {n_clusters} clusters")
+        logger.info(f"Cluster distribution: {np.bincount(self.cluster_labels)}")
     
     def _compute_cluster_risks(self):
         """
         Compute average risk score for each cluster.
         Higher risk clusters indicate more dangerous areas.
         """
-        print("[ML Service] Computing cluster risk scores...")
+        logger.info("Computing cluster risk scores...")
         
-        # Get cluster labels for each data point
-        cols_to_use = [1, 2, 3, 4, 5, 6, 7, 12]
-        crime_features = self.crime_df.iloc[:, cols_to_use].values
-        norm_data = self.scaler.transform(crime_features)
-        cluster_labels = self.kmeans_model.predict(norm_data)
+        # Keep running sums/counts so ingested rows can update the means incrementally
+        n_clusters = self.n_clusters
+        risks = self.crime_points[:, 2]
+        self._cluster_risk_sums = np.bincount(self.cluster_labels, weights=risks, minlength=n_clusters)
+        self._cluster_risk_counts = np.bincount(self.cluster_labels, minlength=n_clusters).astype(float)
+        self._refresh_cluster_risks()
         
-        # Calculate average risk per cluster
-        cluster_risks = {}
-        for cluster_id in range(self.kmeans_model.n_clusters):
-            cluster_indices = np.where(cluster_labels == cluster_id)[0]
-            cluster_risk_scores = [self.crime_coords[i][2] for i in cluster_indices]
-            avg_risk = np.mean(cluster_risk_scores) if cluster_risk_scores else 0
-            cluster_risks[cluster_id] = avg_risk
+        logger.info("Cluster risk scores computed: " + ", ".join(
+            f"{cluster_id}: {risk:.2f}" for cluster_id, risk in sorted(self.cluster_risk_scores.items())
+        ))
+    
+    def _build_risk_cube(self, timezone: str = DEFAULT_TIMEZONE):
+        """Precompute time-of-day risk factors if incident times are available."""
+        times_path = crime_times_path(self.crime_csv_path)
+        if not os.path.exists(times_path):
+            return
+        try:
+            self.risk_cube = RiskCube.from_file(times_path, ZoneInfo(timezone))
+        except Exception as e:
+            # The cube is optional; a bad incidents file must not fail the model build
+            logger.warning(f"Ignoring invalid incident times in {times_path}: {e}")
+    
+    def _refresh_cluster_risks(self):
+        """Rebuild the cluster_id -> average risk map from the running sums."""
+        self.cluster_risk_scores = {
+            cluster_id: (
+                self._cluster_risk_sums[cluster_id] / self._cluster_risk_counts[cluster_id]
+                if self._cluster_risk_counts[cluster_id] > 0 else 0
+            )
+            for cluster_id in range(self.n_clusters)
+        }
+    
+    def _normalize(self, crime_features: np.ndarray) -> np.ndarray:
+        """Standardize features with the fitted means/scales (StandardScaler.transform)."""
+        return (crime_features - self.scaler_mean) / self.scaler_scale
+    
+    def _assign_clusters(self, norm_data: np.ndarray) -> np.ndarray:
+        """Nearest-centroid cluster for each standardized row (KMeans.predict)."""
+        distances = ((norm_data[:, None, :] - self.cluster_centers[None, :, :]) ** 2).sum(axis=2)
+        return distances.argmin(axis=1)
+    
+    def with_crime_rows(self, rows) -> Tuple["MLModelService", Dict[str, int]]:
+        """
+        Build a new snapshot with crime rows added or updated, without retraining.
+        
+        Rows use the same columns as crime.csv. A row whose area name (column 0)
+        already exists replaces that area's data; any other row is appended.
+        New observations are assigned to the nearest cluster and nudge that
+        cluster's centroid with the MiniBatchKMeans online update rule
+        (center += (x - center) / count). Per-cluster risk means are updated
+        from running sums. The scaler is kept fixed so existing assignments
+        remain comparable.
+        
+        This service is left untouched (copy-on-write): requests that pinned it
+        keep scoring every route against the same data, and the caller publishes
+        the returned snapshot (see ModelManager.ingest).
+        
+        Args:
+            rows: DataFrame or list of dicts with crime.csv columns; if an area
+                appears more than once, its last row is used
+        
+        Returns:
+            (new snapshot, dict with counts of added and updated areas); the
+            snapshot is this service itself when there are no rows
+        
+        Raises:
+            ValueError: If columns are missing or a value is missing or non-finite
+        """
+        import copy
+        import pandas as pd
+        
+        if not isinstance(rows, pd.DataFrame):
+            rows = pd.DataFrame(list(rows))
+        if len(rows) == 0:
+            return self, {"added": 0, "updated": 0}
+        
+        missing = [col for col in self.columns if col not in rows.columns]
+        if missing:
+            raise ValueError(f"Crime rows missing columns: {', '.join(missing)}")
+        rows = rows[self.columns]
+        # A feed batch may repeat an area; its last row wins, as if sent in a later batch
+        rows = rows[~rows.iloc[:, 0].astype(str).duplicated(keep="last").to_numpy()]
+        
+        features = rows.iloc[:, CRIME_FEATURE_COLUMNS].values.astype(float)
+        lons = rows.iloc[:, 10].values.astype(float)
+        lats = rows.iloc[:, 11].values.astype(float)
+        names = [str(name) for name in rows.iloc[:, 0]]
+        
+        # A NaN would poison its cluster's centroid and risk mean for good (and a
+        # NaN score clamps to 100, i.e. "perfectly safe"), so reject the batch first
+        finite = np.isfinite(features).all(axis=1) & np.isfinite(lons) & np.isfinite(lats)
+        if not finite.all():
+            bad = [names[i] for i in np.flatnonzero(~finite)]
+            raise ValueError(f"Crime rows with missing or non-finite values: {', '.join(bad[:10])}")
+        
+        norm_data = self._normalize(features)
+        labels = self._assign_clusters(norm_data)
+        risk_scores = _compute_risk_scores(features)
+        
+        # Work on copies; the new snapshot gets them, this one keeps its own
+        crime_points = self.crime_points.copy()
+        crime_features = self.crime_features.copy()
+        cluster_labels = self.cluster_labels.copy()
+        area_names = list(self.area_names)
+        area_index = dict(self.area_index)
+        centers = self.cluster_centers.copy()
+        center_counts = self._center_counts.copy()
+        risk_sums = self._cluster_risk_sums.copy()
+        risk_counts = self._cluster_risk_counts.copy()
+        
+        new_rows = []
+        added = 0
+        updated = 0
         
-        self.cluster_risk_scores = cluster_risks
+        for i, name in enumerate(names):
+            label = int(labels[i])
+            point = (lats[i], lons[i], risk_scores[i])
+            
+            if name in area_index:
+                # Update: remove the old row's contribution to its cluster risk mean
+                idx = area_index[name]
+                old_label = int(cluster_labels[idx])
+                risk_sums[old_label] -= crime_points[idx, 2]
+                risk_counts[old_label] -= 1
+                crime_points[idx] = point
+                crime_features[idx] = features[i]
+                cluster_labels[idx] = label
+                updated += 1
+            else:
+                area_index[name] = len(crime_points) + len(new_rows)
+                area_names.append(name)
+                new_rows.append(i)
+                added += 1
+            
+            risk_sums[label] += risk_scores[i]
+            risk_counts[label] += 1
+            
+            # Online centroid update (same rule MiniBatchKMeans.partial_fit uses)
+            center_counts[label] += 1
+            centers[label] += (norm_data[i] - centers[label]) / center_counts[label]
+        
+        if new_rows:
+            crime_points = np.vstack([crime_points, np.column_stack([lats, lons, risk_scores])[new_rows]])
+            crime_features = np.vstack([crime_features, features[new_rows]])
+            cluster_labels = np.concatenate([cluster_labels, labels[new_rows].astype(cluster_labels.dtype)])
+        
+        # Unchanged parts (scaler, risk cube, columns) are shared read-only
+        service = copy.copy(self)
+        service.crime_features = crime_features
+        service.cluster_labels = cluster_labels
+        service.area_names = area_names
+        service.area_index = area_index
+        service.cluster_centers = centers
+        if self.kmeans_model is not None:
+            service.kmeans_model = copy.copy(self.kmeans_model)
+            service.kmeans_model.cluster_centers_ = centers
+        service._center_counts = center_counts
+        service._cluster_risk_sums = risk_sums
+        service._cluster_risk_counts = risk_counts
+        service._refresh_cluster_risks()
+        service.crime_points = crime_points
         
-        print(f"[ML Service] Cluster risk scores computed:")
-        for cluster_id, risk in sorted(self.cluster_risk_scores.items()):
-            print(f"  Cluster {cluster_id}: {risk:.2f} risk score")
+        logger.info(f"Ingested crime rows: {added} added, {updated} updated "
+                    f"({len(crime_points)} data points)")
+        
+        return service, {"added": added, "updated": updated}
     
-    def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    def point_risks(
+        self,
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        hour_of_week: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Calculate Haversine distance between two coordinates in kilometers.
+        Risk field at arbitrary points, vectorized over points and crime data.
+        
+        For each point, crime data points within RISK_RADIUS_KM contribute their
+        risk weighted by 1 / (1 + distance_km); the result is averaged over the
+        nearby crime points. Points are processed in chunks to bound memory.
+        With an hour of week and a risk cube, each risk is scaled by the cube's
+        factor for that hour and grid cell.
         
         Args:
-            lat1, lon1: First coordinate
-            lat2, lon2: Second coordinate
+            lats, lngs: Arrays of point coordinates
+            hour_of_week: Optional hour of week (0 = Monday 00:00) for temporal risk
         
         Returns:
-            Distance in kilometers
+            (risks, has_nearby): risk per point, and whether any crime data was in range
         """
-        R = 6371  # Earth radius in km
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = (math.sin(dlat / 2) ** 2 +
-             math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
-             math.sin(dlon / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
+        lats = np.asarray(lats, dtype=float).ravel()
+        lngs = np.asarray(lngs, dtype=float).ravel()
+        crime_points = self.crime_points
+        risks = np.zeros(len(lats))
+        has_nearby = np.zeros(len(lats), dtype=bool)
+        if len(crime_points) == 0 or len(lats) == 0:
+            return risks, has_nearby
+        
+        crime_lat = np.radians(crime_points[:, 0])
+        crime_lng = np.radians(crime_points[:, 1])
+        crime_risk = crime_points[:, 2]
+        cos_crime_lat = np.cos(crime_lat)
+        
+        chunk = max(1, RISK_FIELD_CHUNK_ELEMENTS // len(crime_points))
+        for start in range(0, len(lats), chunk):
+            lat = np.radians(lats[start:start + chunk])[:, None]
+            lng = np.radians(lngs[start:start + chunk])[:, None]
+            
+            # Haversine distance in km (Earth radius 6371 km)
+            a = (np.sin((crime_lat - lat) / 2) ** 2 +
+                 np.cos(lat) * cos_crime_lat * np.sin((crime_lng - lng) / 2) ** 2)
+            distance_km = 6371 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+            
+            # Inverse distance weighting within the search radius: closer = higher risk
+            nearby = distance_km <= RISK_RADIUS_KM
+            weighted = np.where(nearby, crime_risk / (1.0 + distance_km), 0.0)
+            nearby_count = nearby.sum(axis=1)
+            
+            has_nearby[start:start + chunk] = nearby_count > 0
+            risks[start:start + chunk] = weighted.sum(axis=1) / np.maximum(nearby_count, 1)
+        
+        if hour_of_week is not None and self.risk_cube is not None:
+            risks *= self.risk_cube.factors_at(lats, lngs, hour_of_week)
+        
+        return risks, has_nearby
     
-    def score_route_safety(self, route_coords: List[List[float]]) -> float:
+    def score_route_safety(self, route_coords: List[List[float]], hour_of_week: Optional[int] = None) -> float:
         """
         Score a route's safety based on proximity to high-risk crime clusters.
         
@@ -188,48 +723,26 @@ class MLModelService:
         5. Convert to safety score (0-100, higher = safer)
         
         Args:
-            route_coords: List of [lat, lng] coordinates along the route
+            route_coords: (N, 2) array (or list) of [lat, lng] coordinates along the route
+            hour_of_week: Optional departure hour of week for time-of-day risk
         
         Returns:
             Safety score (0-100, where 100 is safest)
         """
-        if not route_coords:
+        if len(route_coords) == 0:
             return 50.0  # Default neutral score
         
-        RISK_RADIUS_KM = 5.0  # Search radius for nearby crime data
-        
-        point_count = 0
-        risky_point_count = 0
-        total_risk_at_risky_points = 0.0
-        max_point_risk = 0.0
-        
         # Sample route points (every Nth point to avoid over-processing)
         sample_rate = max(1, len(route_coords) // 50)  # Sample ~50 points max
-        sampled_coords = route_coords[::sample_rate]
+        sampled = np.asarray(route_coords[::sample_rate], dtype=float)
         
-        for lat, lng in sampled_coords:
-            point_risk = 0.0
-            nearby_count = 0
-            
-            # Check proximity to crime data points
-            for crime_lat, crime_lon, crime_risk in self.crime_coords:
-                distance_km = self._calculate_distance(lat, lng, crime_lat, crime_lon)
-                
-                # Consider crimes within the search radius
-                if distance_km <= RISK_RADIUS_KM:
-                    # Inverse distance weighting: closer = higher risk
-                    weight = 1.0 / (1.0 + distance_km)
-                    point_risk += crime_risk * weight
-                    nearby_count += 1
-            
-            # Normalize by number of nearby crimes
-            if nearby_count > 0:
-                point_risk = point_risk / nearby_count
-                risky_point_count += 1
-                total_risk_at_risky_points += point_risk
-            
-            max_point_risk = max(max_point_risk, point_risk)
-            point_count += 1
+        # Risk at each sampled point from nearby crime data (see point_risks)
+        point_risks, has_nearby = self.point_risks(sampled[:, 0], sampled[:, 1], hour_of_week)
+        
+        point_count = len(point_risks)
+        risky_point_count = int(has_nearby.sum())
+        total_risk_at_risky_points = float(point_risks[has_nearby].sum())
+        max_point_risk = float(point_risks.max()) if point_count else 0.0
         
         # --- Scoring: avoid dilution by zero-risk points ---
         # Instead of averaging ALL points (which dilutes risk to near-zero when
@@ -267,10 +780,18 @@ class MLModelService:
         # Ensure score is between 0-100
         safety_score = max(0, min(100, safety_score))
         
-        print(f"[ML Score] points={point_count}, risky={risky_point_count}, "
-              f"avg_risk_risky={avg_risk_at_risky:.1f}, max_risk={max_point_risk:.1f}, "
-              f"risky_frac={risky_fraction:.2f}, severity={risk_severity:.3f}, "
-              f"combined={combined_risk:.3f}, safety={safety_score:.1f}")
+        # Per-route detail: DEBUG only, and sampled so it stays cheap under load
+        if score_logger.isEnabledFor(logging.DEBUG) and should_sample():
+            score_logger.debug("Scored route", extra={
+                "points": point_count,
+                "risky": risky_point_count,
+                "avg_risk_risky": round(float(avg_risk_at_risky), 1),
+                "max_risk": round(float(max_point_risk), 1),
+                "risky_frac": round(float(risky_fraction), 2),
+                "severity": round(float(risk_severity), 3),
+                "combined": round(float(combined_risk), 3),
+                "safety": round(float(safety_score), 1),
+            })
         
         return round(safety_score, 2)
     
@@ -288,8 +809,8 @@ class MLModelService:
         if not route1 or not route2:
             return False
         
-        coords1 = route1.get("coordinates", [])
-        coords2 = route2.get("coordinates", [])
+        coords1 = route1.get("coordinates", np.empty((0, 2)))
+        coords2 = route2.get("coordinates", np.empty((0, 2)))
         
         if len(coords1) != len(coords2):
             return True
@@ -306,17 +827,14 @@ class MLModelService:
             return False
         
         step = max(1, len(coords1) // sample_size)
-        differences = 0
-        
-        for i in range(0, len(coords1), step):
-            if i >= len(coords2):
-                return True
-            lat1, lng1 = coords1[i]
-            lat2, lng2 = coords2[i]
-            # Calculate distance between points
-            dist = self._calculate_distance(lat1, lng1, lat2, lng2)
-            if dist > 0.1:  # More than 100m difference
-                differences += 1
+        
+        # Haversine distance in km between the sampled point pairs
+        p1 = np.radians(np.asarray(coords1, dtype=float)[::step])
+        p2 = np.radians(np.asarray(coords2, dtype=float)[::step])
+        a = (np.sin((p2[:, 0] - p1[:, 0]) / 2) ** 2 +
+             np.cos(p1[:, 0]) * np.cos(p2[:, 0]) * np.sin((p2[:, 1] - p1[:, 1]) / 2) ** 2)
+        dist = 6371 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        differences = int((dist > 0.1).sum())  # More than 100m difference
         
         # If more than 30% of sampled points differ significantly, routes are different
         return differences > (sample_size * 0.3)
@@ -326,7 +844,8 @@ class MLModelService:
         start_lat: float, 
         start_lng: float, 
         end_lat: float, 
-        end_lng: float
+        end_lng: float,
+        priority: int = PRIORITY_PRIMARY
     ) -> List[Dict]:
         """
         Fetch multiple route options from Geoapify API.
@@ -337,21 +856,40 @@ class MLModelService:
         - Balanced route (if available)
         - Alternative routes using alternatives parameter
         
+        Calls go through the shared Geoapify governor: the alternatives call has
+        priority, and the preference fallbacks are skipped when the rate budget
+        runs low. While the Geoapify circuit breaker is open no calls are made.
+        
         Args:
             start_lat, start_lng: Start coordinates
             end_lat, end_lng: End coordinates
+            priority: Governor priority of the alternatives call (background
+                refreshes pass PRIORITY_FALLBACK so they never delay live requests)
         
         Returns:
             List of route dictionaries with coordinates, distance, and duration
+        
+        Raises:
+            UpstreamError: If no routes could be fetched because Geoapify is
+                rate limited, failing, or its circuit breaker is open
         """
+        if not GEOAPIFY_API_KEY:
+            raise ValueError(GEOAPIFY_KEY_MISSING_MESSAGE)
+        
         routes = []
         seen_routes = []  # Track routes to avoid duplicates
+        upstream_error = None
         
         try:
             # Method 1: Fetch with alternatives parameter (gets multiple routes in one call)
-            alt_routes = await self._fetch_geoapify_alternatives(
-                start_lat, start_lng, end_lat, end_lng
-            )
+            try:
+                alt_routes = await self._fetch_geoapify_alternatives(
+                    start_lat, start_lng, end_lat, end_lng, priority
+                )
+            except UpstreamUnavailableError as e:
+                # Fallbacks below still run if the breaker allows; re-raised if they get nothing
+                upstream_error = e
+                alt_routes = []
             for route in alt_routes:
                 if route and self._is_unique_route(route, seen_routes):
                     routes.append(route)
@@ -383,12 +921,15 @@ class MLModelService:
                     routes.append(route_balanced)
                     seen_routes.append(route_balanced)
             
-            print(f"[ML Service] Fetched {len(routes)} unique route(s)")
+            logger.debug("Fetched %d unique route(s)", len(routes))
             
+        except UpstreamBusyError:
+            raise
         except Exception as e:
-            print(f"[ML Service] Error fetching routes: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Error fetching routes: {e}")
+        
+        if not routes and upstream_error is not None:
+            raise upstream_error
         
         return routes
     
@@ -408,7 +949,8 @@ class MLModelService:
         start_lat: float,
         start_lng: float,
         end_lat: float,
-        end_lng: float
+        end_lng: float,
+        priority: int = PRIORITY_PRIMARY
     ) -> List[Dict]:
         """
         Fetch multiple alternative routes from Geoapify using alternatives parameter.
@@ -416,58 +958,142 @@ class MLModelService:
         Args:
             start_lat, start_lng: Start coordinates
             end_lat, end_lng: End coordinates
+            priority: Governor priority of the call
         
         Returns:
             List of route dictionaries
+        
+        Raises:
+            UpstreamBusyError: If the Geoapify rate budget has no room for the call
+            UpstreamUnavailableError: If Geoapify is failing or its circuit is open
         """
         routes = []
         
+        permit = geoapify_breaker.allow()
+        if permit is None:
+            raise UpstreamUnavailableError(
+                "Routing provider unavailable, please retry shortly",
+                retry_after_s=geoapify_breaker.retry_after_s()
+            )
+        
+        try:
+            with span("geoapify rate limit wait"):
+                acquired = await geoapify_governor.acquire(priority)
+        except BaseException:
+            geoapify_breaker.release(permit)
+            raise
+        if not acquired:
+            geoapify_breaker.release(permit)
+            raise UpstreamBusyError(
+                "Routing capacity exhausted, please retry shortly",
+                retry_after_s=geoapify_governor.retry_after_s()
+            )
+        
         # Try to get alternatives (up to 3 routes)
         url = (
-            f"https://api.geoapify.com/v1/routing?"
+            f"{GEOAPIFY_ROUTING_URL}?"
             f"waypoints={start_lat},{start_lng}|{end_lat},{end_lng}"
             f"&mode=drive&alternatives=3&apiKey={GEOAPIFY_API_KEY}"
         )
         
+        data = await self._request_geoapify(url, "alternatives", permit)
+        
+        if data and data.get("features"):
+            # Process all features (each is a route)
+            for feature in data["features"]:
+                route = self._parse_geoapify_feature(feature)
+                if route:
+                    routes.append(route)
+        
+        if data is not None:
+            logger.debug("Got %d route(s) from alternatives API", len(routes))
+        
+        return routes
+    
+    async def _request_geoapify(self, url: str, label: str, permit: BreakerPermit) -> Optional[Dict]:
+        """
+        GET a Geoapify routing URL and report the outcome to the circuit breaker.
+        
+        Timeouts, connection errors and 5xx responses count as failures; a 429
+        drains the rate governor instead. The caller must already hold a
+        breaker permit (allow()) and a governor token.
+        
+        Args:
+            url: Full request URL
+            label: Short name of the call (for logs)
+            permit: The call's breaker permit, handed back with the outcome
+        
+        Returns:
+            Parsed JSON body on HTTP 200, None for other non-failure responses
+        
+        Raises:
+            UpstreamUnavailableError: On timeout, connection error or 5xx
+        """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            with span(f"geoapify {label}"):
+                async with aiohttp.ClientSession(timeout=GEOAPIFY_TIMEOUT) as session:
+                    async with session.get(url) as response:
+                        if response.status >= 500:
+                            raise aiohttp.ClientResponseError(
+                                response.request_info, response.history, status=response.status
+                            )
                         
-                        if data.get("features"):
-                            # Process all features (each is a route)
-                            for feature in data["features"]:
-                                route = self._parse_geoapify_feature(feature)
-                                if route:
-                                    routes.append(route)
+                        if response.status != 200:
+                            logger.warning("Geoapify %s returned status %d", label, response.status)
+                            if response.status == 429:
+                                geoapify_governor.note_throttled()
+                                geoapify_breaker.release(permit)
+                            else:
+                                geoapify_breaker.record_success(permit)
+                            return None
                         
-                        print(f"[ML Service] Got {len(routes)} route(s) from alternatives API")
-                    else:
-                        print(f"[ML Service] Alternatives API returned status {response.status}")
-        except Exception as e:
-            print(f"[ML Service] Error fetching alternatives: {e}")
+                        data = _json_loads(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            geoapify_breaker.record_failure(permit)
+            logger.warning("Geoapify %s failed: %r", label, e)
+            raise UpstreamUnavailableError(
+                "Routing provider unavailable, please retry shortly",
+                retry_after_s=geoapify_breaker.retry_after_s()
+            ) from e
+        except asyncio.CancelledError:
+            # The request was abandoned (client disconnect or deadline): no verdict on upstream health
+            geoapify_breaker.release(permit)
+            geoapify_governor.note_cancelled()
+            raise
+        except BaseException:
+            # Unexpected: no verdict on upstream health
+            geoapify_breaker.release(permit)
+            raise
         
-        return routes
+        geoapify_breaker.record_success(permit)
+        return data
     
     def _parse_geoapify_feature(self, feature: Dict) -> Optional[Dict]:
-        """Parse a Geoapify feature into route dictionary."""
+        """
+        Parse a Geoapify feature into route dictionary.
+        
+        Coordinates become one (N, 2) float array per route: each line is
+        converted with a single np.asarray call, and [lng, lat] is flipped to
+        [lat, lng] by a view instead of building per-point lists. The array is
+        used for dedup and scoring; convert with .tolist() only for responses.
+        """
         try:
             geometry = feature.get("geometry", {})
             properties = feature.get("properties", {})
             
             # Extract coordinates
+            coords = geometry.get("coordinates", [])
             if geometry.get("type") == "MultiLineString":
-                coords = geometry.get("coordinates", [])
-                flattened = [item for sublist in coords for item in sublist]
+                lines = [np.asarray(line, dtype=float).reshape(len(line), -1) for line in coords if line]
+                lng_lat = np.concatenate(lines) if lines else np.empty((0, 2))
             else:
-                flattened = geometry.get("coordinates", [])
+                lng_lat = np.asarray(coords, dtype=float).reshape(len(coords), -1)
             
-            if not flattened:
+            if len(lng_lat) == 0:
                 return None
             
-            # Convert from [lng, lat] to [lat, lng]
-            route_coords = [[coord[1], coord[0]] for coord in flattened]
+            # Convert from [lng, lat] to [lat, lng] (a view, no copy)
+            route_coords = lng_lat[:, 1::-1]
             
             # Extract distance and duration
             distance_m = (
@@ -484,12 +1110,12 @@ class MLModelService:
             )
             
             return {
-                "coordinates": route_coords,
+                "coordinates": route_coords,  # (N, 2) array of [lat, lng]
                 "distance_km": distance_m / 1000.0 if distance_m else 0,
                 "duration_min": duration_s / 60.0 if duration_s else 0
             }
         except Exception as e:
-            print(f"[ML Service] Error parsing feature: {e}")
+            logger.warning("Error parsing feature: %s", e)
             return None
     
     async def _fetch_geoapify_route(
@@ -499,7 +1125,8 @@ class MLModelService:
         end_lat: float,
         end_lng: float,
         mode: str = "drive",
-        preference: str = None
+        preference: str = None,
+        priority: int = PRIORITY_FALLBACK
     ) -> Optional[Dict]:
         """
         Fetch a single route from Geoapify Directions API.
@@ -509,12 +1136,28 @@ class MLModelService:
             end_lat, end_lng: End coordinates
             mode: Route mode (drive, walk, etc.)
             preference: Route preference (fastest, shortest, balanced)
+            priority: Governor priority (fallback calls are skipped under pressure)
         
         Returns:
             Route dictionary with coordinates, distance_km, duration_min
+            (None if the call was skipped or failed)
         """
+        permit = geoapify_breaker.allow()
+        if permit is None:
+            return None
+        
+        try:
+            acquired = await geoapify_governor.acquire(priority)
+        except BaseException:
+            geoapify_breaker.release(permit)
+            raise
+        if not acquired:
+            geoapify_breaker.release(permit)
+            logger.debug("Skipping %s route fetch (rate budget low)", preference or "default")
+            return None
+        
         url = (
-            f"https://api.geoapify.com/v1/routing?"
+            f"{GEOAPIFY_ROUTING_URL}?"
             f"waypoints={start_lat},{start_lng}|{end_lat},{end_lng}"
             f"&mode={mode}&apiKey={GEOAPIFY_API_KEY}"
         )
@@ -522,16 +1165,22 @@ class MLModelService:
         if preference:
             url += f"&preference={preference}"
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return None
-                
-                data = await response.json()
-                
-                if not data.get("features"):
-                    return None
-                
-                feature = data["features"][0]
-                return self._parse_geoapify_feature(feature)
+        try:
+            data = await self._request_geoapify(url, preference or "default route", permit)
+        except UpstreamUnavailableError:
+            return None
+        
+        if not data or not data.get("features"):
+            return None
+        
+        feature = data["features"][0]
+        return self._parse_geoapify_feature(feature)
 
+if __name__ == "__main__":
+    # Prebuild the model artifact (e.g. during deploy) so servers start without training:
+    #   python ml_service.py [crime.csv] [artifact.npz]
+    import sys
+    
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(_project_root, "crime.csv")
+    artifact_path = sys.argv[2] if len(sys.argv) > 2 else MODEL_ARTIFACT_PATH
+    MLModelService.load(csv_path, artifact_path)
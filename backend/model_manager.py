@@ -0,0 +1,202 @@
+"""
+Model Manager for SafarSaheli Backend
+
+Owns the active MLModelService snapshot and replaces it without a server restart.
+A reload builds a brand new service in a worker thread (off the event loop) and
+swaps it in with a single reference assignment, so requests that already grabbed
+the old snapshot finish on it while new requests see the new one.
+"""
+
+import asyncio
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app_logging import get_logger
+from ml_service import MLModelService
+from risk_cube import DEFAULT_TIMEZONE
+
+logger = get_logger("model_manager")
+
+
+class ModelManager:
+    """
+    Holds the current MLModelService snapshot and its version.
+
+    Reloads can be triggered manually (admin endpoint) or by watching the crime
+    data file for changes. Swap listeners are notified with the new version so
+    caches tied to the old model can be invalidated.
+    """
+
+    def __init__(
+        self,
+        crime_csv_path: str,
+        artifact_path: Optional[str] = None,
+        watch_interval_s: float = 5.0,
+        timezone: str = DEFAULT_TIMEZONE
+    ):
+        """
+        Args:
+            crime_csv_path: Path to crime.csv file
+            artifact_path: Optional prebuilt model artifact (rebuilt if stale)
+            watch_interval_s: Seconds between file change checks (0 disables watching)
+            timezone: IANA timezone incident times are binned in (the region's)
+        """
+        self.crime_csv_path = crime_csv_path
+        self.artifact_path = artifact_path
+        self.timezone = timezone
+        self.watch_interval_s = watch_interval_s
+        self.service: Optional[MLModelService] = None
+        self.version = 0
+        self.loaded_at: Optional[float] = None
+        self.last_reload_error: Optional[str] = None
+        self._source_signature: Optional[Tuple[int, int]] = None
+        self._reload_lock = asyncio.Lock()
+        self._swap_listeners: List[Callable[[int], None]] = []
+
+    def add_swap_listener(self, listener: Callable[[int], None]):
+        """Register a callback invoked with the new version after every swap."""
+        self._swap_listeners.append(listener)
+
+    def _read_source_signature(self) -> Optional[Tuple[int, int]]:
+        """Return (mtime_ns, size) of the crime data file, or None if missing."""
+        try:
+            stat = os.stat(self.crime_csv_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _swap(self, service: MLModelService, signature: Optional[Tuple[int, int]]):
+        """Atomically publish a new snapshot and notify listeners."""
+        self.service = service
+        self._source_signature = signature
+        self.last_reload_error = None
+        self._bump_version()
+
+    def _bump_version(self):
+        """Advance the model version and notify listeners."""
+        self.version += 1
+        self.loaded_at = time.time()
+
+        for listener in self._swap_listeners:
+            try:
+                listener(self.version)
+            except Exception as e:
+                logger.exception(f"Swap listener failed: {e}")
+
+    @property
+    def ready(self) -> bool:
+        """True once a model snapshot is available for scoring."""
+        return self.service is not None
+
+    async def reload(self, reason: str = "manual") -> int:
+        """
+        Build a new snapshot in a worker thread and swap it in.
+
+        Concurrent reload requests are serialized; the old snapshot keeps serving
+        until the new one is fully built. If the build fails the old snapshot is
+        kept and the error is re-raised.
+
+        Args:
+            reason: Short description of what triggered the reload (for logs)
+
+        Returns:
+            The model version now being served
+        """
+        async with self._reload_lock:
+            logger.info(f"Reloading model ({reason})...")
+            signature = self._read_source_signature()
+            started = time.perf_counter()
+
+            try:
+                service = await asyncio.to_thread(
+                    MLModelService.load, self.crime_csv_path, self.artifact_path, self.timezone
+                )
+            except Exception as e:
+                self.last_reload_error = str(e)
+                logger.error(f"Reload failed, keeping version {self.version}: {e}")
+                raise
+
+            self._swap(service, signature)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info(f"Now serving model version {self.version} "
+                        f"(built in {elapsed_ms:.0f} ms)")
+            return self.version
+
+    def unload(self):
+        """
+        Drop the current snapshot to free memory (used by the region registry).
+        
+        Requests that already pinned the snapshot finish on it; the version is
+        kept so entries cached from it are refreshed after the next load.
+        """
+        self.service = None
+        self._source_signature = None
+
+    async def warm_up(self, retry_interval_s: float = 30.0):
+        """
+        Build the first snapshot in the background so the server can start
+        serving (liveness, SOS, SMS) immediately.
+
+        Failed builds are retried every retry_interval_s until one succeeds;
+        readiness stays false meanwhile and last_reload_error explains why.
+        """
+        while self.service is None:
+            try:
+                await self.reload(reason="startup warm-up")
+            except Exception:
+                await asyncio.sleep(retry_interval_s)
+
+    async def ingest(self, rows: List[Dict]) -> Dict[str, int]:
+        """
+        Publish a snapshot with new or updated crime rows applied incrementally.
+
+        The new snapshot is built from copies in a worker thread (serialized
+        with reloads) and swapped in like a reload, so in-flight requests finish
+        on the snapshot they pinned and caches see a new version. Ingested rows
+        are not written back to the crime data file, so a later full reload
+        only keeps them if the file was updated too.
+
+        Args:
+            rows: List of dicts with crime.csv columns
+
+        Returns:
+            Dict with counts of added and updated rows
+        """
+        async with self._reload_lock:
+            if self.service is None:
+                raise RuntimeError("ML model not loaded")
+            service, result = await asyncio.to_thread(self.service.with_crime_rows, rows)
+            if service is not self.service:
+                self._swap(service, self._source_signature)
+            return result
+
+    async def watch(self):
+        """
+        Poll the crime data file and reload when it changes.
+
+        A change is only applied once the file signature is stable across two
+        consecutive polls, so a file that is still being written is not loaded.
+        """
+        if self.watch_interval_s <= 0:
+            return
+
+        pending_signature = None
+        while True:
+            await asyncio.sleep(self.watch_interval_s)
+
+            signature = self._read_source_signature()
+            if signature is None or signature == self._source_signature:
+                pending_signature = None
+                continue
+
+            if signature != pending_signature:
+                pending_signature = signature
+                continue
+
+            pending_signature = None
+            try:
+                await self.reload(reason="crime data file changed")
+            except Exception:
+                # Already logged; keep serving the previous snapshot and retry on next change
+                self._source_signature = signature
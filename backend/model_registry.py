@@ -0,0 +1,229 @@
+"""
+Model Registry for SafarSaheli Backend
+
+Serves several cities from one deployment. The world is partitioned into
+regions by bounding box, each backed by its own ModelManager (crime data +
+prebuilt artifact). The default region is loaded at startup and always kept
+resident; other regions are loaded on their first request and kept in memory
+under an LRU budget, so a deployment only pays for the cities being used.
+
+Regions are configured by a JSON file (REGIONS_CONFIG):
+
+    {
+      "default": "delhi",
+      "regions": [
+        {"name": "delhi", "bbox": [28.40, 76.80, 28.90, 77.40],
+         "crime_csv": "crime.csv", "artifact": "artifacts/crime_model.npz"},
+        {"name": "mumbai", "bbox": [18.85, 72.75, 19.30, 73.05],
+         "artifact": "artifacts/mumbai_model.npz", "timezone": "Asia/Kolkata"}
+      ]
+    }
+
+bbox is [min_lat, min_lng, max_lat, max_lng]; relative paths are resolved
+against the project root. timezone (IANA name, default Asia/Kolkata) is the
+local time incident hours are recorded in.
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app_logging import get_logger
+from ml_service import MLModelService
+from model_manager import ModelManager
+from risk_cube import DEFAULT_TIMEZONE
+
+logger = get_logger("model_registry")
+
+
+class Region:
+    """One bounding box and the model serving it."""
+
+    def __init__(
+        self,
+        name: str,
+        bbox: Tuple[float, float, float, float],
+        manager: ModelManager,
+        timezone: str = DEFAULT_TIMEZONE
+    ):
+        """
+        Args:
+            name: Region name (used in cache keys, logs and metrics)
+            bbox: (min_lat, min_lng, max_lat, max_lng)
+            manager: ModelManager holding this region's snapshot
+            timezone: IANA timezone of the region's local time
+        """
+        self.name = name
+        self.bbox = tuple(bbox)
+        self.manager = manager
+        self.tz = ZoneInfo(timezone)
+        self.pinned = False
+        self.loads = 0
+        self.evictions = 0
+        self._load_lock = asyncio.Lock()
+
+    def contains(self, lat: float, lng: float) -> bool:
+        """True if the point lies inside this region's bounding box."""
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the resident snapshot (0 when unloaded)."""
+        service = self.manager.service
+        return service.approx_memory_bytes() if service is not None else 0
+
+
+class ModelRegistry:
+    """Routes coordinates to regional models and keeps hot regions resident."""
+
+    def __init__(self, regions: List[Region], default_region: str, memory_budget_bytes: int):
+        """
+        Args:
+            regions: Configured regions, checked in order
+            default_region: Name of the region used when no bounding box matches
+            memory_budget_bytes: Resident model memory allowed before LRU eviction
+        """
+        self.regions = regions
+        self.by_name = {region.name: region for region in regions}
+        if default_region not in self.by_name:
+            raise ValueError(f"Default region {default_region!r} is not configured")
+        self.default = self.by_name[default_region]
+        self.default.pinned = True
+        self.memory_budget_bytes = memory_budget_bytes
+        self._resident: "OrderedDict[str, Region]" = OrderedDict()
+
+    @classmethod
+    def from_config(
+        cls,
+        config_path: Optional[str],
+        project_root: str,
+        default_csv: str,
+        default_artifact: Optional[str],
+        watch_interval_s: float,
+        memory_budget_bytes: int
+    ) -> "ModelRegistry":
+        """
+        Build the registry from a regions JSON file, or a single Delhi region
+        backed by crime.csv when no config file is given.
+
+        Only the default region watches its crime data file for changes.
+        """
+        if not config_path:
+            manager = ModelManager(default_csv, artifact_path=default_artifact, watch_interval_s=watch_interval_s)
+            region = Region("delhi", (28.40, 76.80, 28.90, 77.40), manager)
+            return cls([region], "delhi", memory_budget_bytes)
+
+        with open(config_path) as f:
+            config = json.load(f)
+
+        def resolve(path: Optional[str]) -> Optional[str]:
+            if not path:
+                return None
+            return path if os.path.isabs(path) else os.path.join(project_root, path)
+
+        entries = config["regions"]
+        default_name = config.get("default", entries[0]["name"])
+        regions = []
+        for entry in entries:
+            name = entry["name"]
+            artifact = resolve(entry.get("artifact"))
+            crime_csv = resolve(entry.get("crime_csv")) or os.path.join(project_root, f"{name}_crime.csv")
+            timezone = entry.get("timezone", DEFAULT_TIMEZONE)
+            manager = ModelManager(
+                crime_csv,
+                artifact_path=artifact,
+                watch_interval_s=watch_interval_s if name == default_name else 0,
+                timezone=timezone,
+            )
+            regions.append(Region(name, entry["bbox"], manager, timezone))
+
+        logger.info(f"Configured regions: {', '.join(r.name for r in regions)} "
+                    f"(default: {default_name})")
+        return cls(regions, default_name, memory_budget_bytes)
+
+    def region_at(self, lat: float, lng: float) -> Region:
+        """Region whose bounding box contains the point, else the default region."""
+        for region in self.regions:
+            if region.contains(lat, lng):
+                return region
+        return self.default
+
+    def region_for(self, start_lat: float, start_lng: float, end_lat: float, end_lng: float) -> Region:
+        """
+        Pick the shard for a route: the region containing both endpoints, else
+        the one containing the start, else the one containing the end, else the
+        default region.
+        """
+        for region in self.regions:
+            if region.contains(start_lat, start_lng) and region.contains(end_lat, end_lng):
+                return region
+        for lat, lng in ((start_lat, start_lng), (end_lat, end_lng)):
+            for region in self.regions:
+                if region.contains(lat, lng):
+                    return region
+        return self.default
+
+    async def acquire(self, region: Region) -> MLModelService:
+        """
+        Return the region's snapshot, loading it first if it is not resident.
+
+        Concurrent first requests for a region share one load. Loading may
+        evict the least recently used non-default regions to stay within the
+        memory budget.
+
+        Raises:
+            Exception: If the region's model cannot be loaded
+        """
+        service = region.manager.service
+        if service is None:
+            async with region._load_lock:
+                if region.manager.service is None:
+                    await region.manager.reload(reason=f"first request for region {region.name}")
+                    region.loads += 1
+                service = region.manager.service
+
+        self._resident[region.name] = region
+        self._resident.move_to_end(region.name)
+        self._evict(keep=region)
+        return service
+
+    def _evict(self, keep: Region):
+        """Unload least recently used regions until resident memory fits the budget."""
+        for name in list(self._resident):
+            if self.resident_bytes() <= self.memory_budget_bytes:
+                return
+            region = self._resident[name]
+            if region is keep or region.pinned:
+                continue
+            region.manager.unload()
+            region.evictions += 1
+            del self._resident[name]
+            logger.info(f"Evicted region {name} to stay within the memory budget")
+
+    def resident_bytes(self) -> int:
+        """Approximate memory held by every loaded region."""
+        return sum(region.memory_bytes() for region in self.regions)
+
+    def stats(self) -> Dict:
+        """Residency, memory and load/eviction counters per region."""
+        return {
+            "default": self.default.name,
+            "memory_budget_mb": round(self.memory_budget_bytes / 2 ** 20, 1),
+            "resident_mb": round(self.resident_bytes() / 2 ** 20, 2),
+            "regions": {
+                region.name: {
+                    "resident": region.manager.service is not None,
+                    "pinned": region.pinned,
+                    "timezone": region.tz.key,
+                    "model_version": region.manager.version,
+                    "memory_mb": round(region.memory_bytes() / 2 ** 20, 2),
+                    "loads": region.loads,
+                    "evictions": region.evictions,
+                    "last_loaded_at": region.manager.loaded_at,
+                }
+                for region in self.regions
+            },
+        }
@@ -0,0 +1,280 @@
+"""
+Profiler for SafarSaheli Backend
+
+On-demand profiling of the running server, guarded by the admin token:
+
+- a sampling profiler thread that snapshots every thread's Python stack
+  (sys._current_frames) at a fixed interval, so the event loop is never
+  instrumented; results are exported as speedscope JSON
+  (https://www.speedscope.app)
+- spans: named wall-clock intervals recorded around awaits (e.g. Geoapify
+  calls) that a stack sampler cannot see because the loop is idle meanwhile;
+  exported as an evented profile in the same file
+- ProfilingMiddleware: profiles a single request end to end when it carries
+  the X-Profile header along with a valid X-Admin-Token
+
+When no profile is running the cost is one header scan per request and one
+context variable lookup per span.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app_logging import get_logger
+
+logger = get_logger("profiler")
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# Spans of the profile the current task belongs to (None when not profiling)
+_active_spans: contextvars.ContextVar = contextvars.ContextVar("profile_spans", default=None)
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+@contextmanager
+def span(name: str):
+    """
+    Record a named wall-clock interval in the active profile, if any.
+
+    Usage:
+        with span("geoapify alternatives"):
+            data = await fetch(...)
+    """
+    spans = _active_spans.get()
+    if spans is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, started, time.perf_counter()))
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of all threads from a background thread."""
+
+    # Only one profiler may run at a time (sampling twice would double the overhead)
+    _running_lock = threading.Lock()
+
+    def __init__(self, name: str, interval_s: float = 0.005):
+        """
+        Args:
+            name: Profile name shown in speedscope
+            interval_s: Seconds between stack samples
+        """
+        self.name = name
+        self.interval_s = interval_s
+        self.spans: List[Tuple[str, float, float]] = []
+        self.sample_count = 0
+        self._stacks: Counter = Counter()  # (thread id, frame index tuple) -> samples
+        self._frames: Dict[Tuple[str, str, int], int] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._stopped = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        """
+        Start sampling.
+
+        Raises:
+            ProfilerBusyError: If another profile is already running
+        """
+        if not self._running_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._stopped = time.perf_counter()
+        self._running_lock.release()
+
+    def _frame_index(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frames.get(key)
+        if index is None:
+            index = self._frames[key] = len(self._frames)
+        return index
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_index(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self._stacks[(thread_id, tuple(stack))] += 1
+            self.sample_count += 1
+            if self.sample_count % 200 == 1:
+                self._thread_names.update((t.ident, t.name) for t in threading.enumerate())
+
+    def to_speedscope(self) -> Dict:
+        """Export samples (one profile per thread) and spans as speedscope JSON."""
+        duration = (self._stopped or time.perf_counter()) - self._started
+        frames = [{"name": name, "file": file, "line": line} for (name, file, line) in self._frames]
+        profiles = []
+
+        by_thread: Dict[int, List[Tuple[Tuple[int, ...], int]]] = {}
+        for (thread_id, stack), count in self._stacks.items():
+            by_thread.setdefault(thread_id, []).append((stack, count))
+        for thread_id, stacks in sorted(by_thread.items(), key=lambda item: -sum(c for _, c in item[1])):
+            profiles.append({
+                "type": "sampled",
+                "name": f"{self._thread_names.get(thread_id, 'thread')} ({thread_id})",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(duration, 6),
+                "samples": [list(stack) for stack, _ in stacks],
+                "weights": [round(count * self.interval_s, 6) for _, count in stacks],
+            })
+
+        if self.spans:
+            events = []
+            for name, started, ended in self.spans:
+                key = (name, "span", 0)
+                if key not in self._frames:
+                    self._frames[key] = len(frames)
+                    frames.append({"name": name})
+                index = self._frames[key]
+                # At equal times closes sort before opens, longer spans open first and close last
+                events.append((started - self._started, 1, -(ended - started), {"type": "O", "frame": index}))
+                events.append((ended - self._started, 0, ended - started, {"type": "C", "frame": index}))
+            events.sort(key=lambda e: e[:3])
+            profiles.append({
+                "type": "evented",
+                "name": "spans (wall clock)",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(max(duration, events[-1][0]), 6),
+                "events": [dict(event, at=round(max(at, 0.0), 6)) for at, _, _, event in events],
+            })
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.name,
+            "exporter": "safarsaheli-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    @contextmanager
+    def recording_spans(self):
+        """Collect spans from the current context (and tasks it creates) into this profile."""
+        token = _active_spans.set(self.spans)
+        try:
+            yield
+        finally:
+            _active_spans.reset(token)
+
+
+async def profile_for(seconds: float, interval_s: float = 0.005) -> Dict:
+    """
+    Sample the whole process for `seconds` and return a speedscope document.
+
+    Raises:
+        ProfilerBusyError: If another profile is already running
+    """
+    profiler = SamplingProfiler(f"SafarSaheli {seconds:g}s profile", interval_s).start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    logger.info(f"Captured {profiler.sample_count} samples over {seconds:g}s")
+    return profiler.to_speedscope()
+
+
+class ProfileStore:
+    """Keeps the most recent per-request profiles for download."""
+
+    def __init__(self, max_entries: int = 20):
+        self.max_entries = max_entries
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def add(self, profile_id: str, profile: Dict):
+        self._profiles[profile_id] = profile
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        return self._profiles.get(profile_id)
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling single requests tagged with an X-Profile header.
+
+    The request must also carry an X-Admin-Token accepted by `is_admin`. The
+    response gets an X-Profile-Id header; the speedscope file is then served by
+    the admin profiles endpoint. Other requests running at the same time show
+    up in the samples too, but spans only come from the tagged request.
+    """
+
+    def __init__(self, app, store: ProfileStore, is_admin: Callable[[Optional[str]], bool]):
+        self.app = app
+        self.store = store
+        self.is_admin = is_admin
+        self._ids = itertools.count(1)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tagged = False
+        token = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile":
+                tagged = True
+            elif name == b"x-admin-token":
+                token = value.decode("latin-1")
+        if not tagged or not self.is_admin(token):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{next(self._ids)}-{uuid.uuid4().hex[:8]}"
+        try:
+            profiler = SamplingProfiler(f"{scope.get('method')} {scope.get('path')}", interval_s=0.001).start()
+        except ProfilerBusyError:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            with profiler.recording_spans(), span("request"):
+                await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            self.store.add(profile_id, profiler.to_speedscope())
+            logger.info(f"Profiled {scope.get('method')} {scope.get('path')} as {profile_id}")
@@ -0,0 +1,334 @@
+"""
+Risk Cube for SafarSaheli Backend
+
+Time-of-day risk for route scoring. Incident-level crime records with a time
+(crime_times.csv/.parquet next to crime.csv) are binned at build time into a
+compact cube of multiplicative factors: hour of week (168) x grid cell. A factor
+of 2 means twice the usual share of a cell's incidents happen in that hour.
+Only cells with incidents are stored, so memory follows the number of occupied
+cells rather than the area they span (one mis-geocoded row far away costs one
+cell, not a grid stretching to it).
+
+Incident files are streamed in chunks and reduced to per (cell, hour) counts as
+they are read, so the full incident table is never held in memory. Incident
+times are binned in the region's local time, the same clock departure times
+are bucketed in (see hour_of_week).
+
+At scoring time the static risk field is multiplied by one factor per route
+point, found by a binary search of the occupied cells and indexing into the
+slice for the departure hour, so temporal scoring costs about the same as
+static scoring.
+"""
+
+import os
+import re
+from datetime import datetime, tzinfo
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app_logging import get_logger
+from data_sources import INCIDENT_CHUNK_ROWS, iter_chunks, read_column_names
+
+logger = get_logger("risk_cube")
+
+HOURS_PER_WEEK = 168
+
+# Local time of regions that do not name a timezone (every shipped region is in India)
+DEFAULT_TIMEZONE = "Asia/Kolkata"
+
+# ISO 8601 time of day followed by a UTC offset ("...T10:00:00Z", "...10:00+05:30")
+_UTC_OFFSET = re.compile(r"\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:[Zz]|[+-]\d{2}(?::?\d{2})?)$")
+
+# Grid cell size in degrees (0.01 ~= 1.1 km)
+RISK_CUBE_CELL_DEG = float(os.getenv("RISK_CUBE_CELL_DEG", "0.01"))
+
+# Pseudo-incidents per hour pulling sparse cells towards the city-wide hourly profile
+RISK_CUBE_PRIOR = float(os.getenv("RISK_CUBE_PRIOR", "1.0"))
+
+# Factors are clipped so a handful of incidents cannot dominate a route's score
+RISK_FACTOR_MIN = 0.2
+RISK_FACTOR_MAX = 5.0
+
+
+def hour_of_week(when: datetime, tz: Optional[tzinfo] = None) -> int:
+    """
+    Hour of week (0 = Monday 00:00) in local time.
+
+    Incidents are binned by local wall-clock time, so a timezone-aware time
+    (e.g. the UTC ISO string a browser sends) is first converted to tz, the
+    region's timezone. A naive time is taken as already local.
+    """
+    if tz is not None and when.tzinfo is not None:
+        when = when.astimezone(tz)
+    return when.weekday() * 24 + when.hour
+
+
+# Packing of (grid row, grid col[, hour]) into one int64 key for aggregation and lookup
+_CELL_OFFSET = 1 << 20
+_HOUR_BITS = 8
+_COL_BITS = 21
+
+
+def _cell_keys(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    return (rows + _CELL_OFFSET) << _COL_BITS | (cols + _CELL_OFFSET)
+
+
+def _pack_keys(rows: np.ndarray, cols: np.ndarray, hours: np.ndarray) -> np.ndarray:
+    return (_cell_keys(rows, cols) << _HOUR_BITS) | hours
+
+
+def _unpack_keys(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    hours = keys & ((1 << _HOUR_BITS) - 1)
+    cells = keys >> _HOUR_BITS
+    cols = (cells & ((1 << _COL_BITS) - 1)) - _CELL_OFFSET
+    rows = (cells >> _COL_BITS) - _CELL_OFFSET
+    return rows, cols, hours
+
+
+def _reduce(keys: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum weights per distinct key."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=weights, minlength=len(unique))
+
+
+def aggregate_incidents(
+    path: str,
+    cell_deg: float = RISK_CUBE_CELL_DEG,
+    chunk_rows: int = INCIDENT_CHUNK_ROWS,
+    tz: Optional[tzinfo] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Stream time-stamped incidents and count them per grid cell and hour of week.
+
+    Accepted columns: lat, lng and either `timestamp` (ISO 8601; local time
+    unless it has a UTC offset) or `day_of_week` (0 = Monday) plus `hour` in
+    local time; an optional `count` column weights each row. Other columns are
+    not read.
+
+    Args:
+        path: CSV, Parquet or Feather incidents file
+        cell_deg: Grid cell size in degrees
+        chunk_rows: Rows read per chunk
+        tz: Region timezone that timestamps with a UTC offset are converted to
+
+    Returns:
+        (rows, cols, hours, weights, n_incidents): absolute grid cell indices
+        (floor(coordinate / cell_deg)), hour of week and summed weight per
+        occupied (cell, hour), plus the number of incidents read
+    """
+    available = set(read_column_names(path))
+    if "timestamp" not in available and not {"day_of_week", "hour"} <= available:
+        # Undated incidents carry no time-of-day signal; they go in the incidents feed
+        raise KeyError("Incident file has no timestamp or day_of_week/hour columns "
+                       "(undated incidents belong in the _incidents file)")
+    time_columns = ["timestamp"] if "timestamp" in available else ["day_of_week", "hour"]
+    columns = ["lat", "lng"] + time_columns + (["count"] if "count" in available else [])
+    missing = [c for c in columns if c not in available]
+    if missing:
+        raise KeyError(f"Incident file missing columns: {', '.join(missing)}")
+
+    keys = np.empty(0, dtype=np.int64)
+    sums = np.empty(0, dtype=float)
+    n_incidents = 0
+    for chunk in iter_chunks(path, columns, chunk_rows):
+        if "timestamp" in chunk.columns:
+            hours = _local_hours_of_week(chunk["timestamp"], tz)
+        else:
+            hours = (chunk["day_of_week"] * 24 + chunk["hour"]).to_numpy(dtype=float, na_value=np.nan)
+        lats = chunk["lat"].to_numpy(dtype=float, na_value=np.nan)
+        lngs = chunk["lng"].to_numpy(dtype=float, na_value=np.nan)
+        if "count" in chunk.columns:
+            weights = chunk["count"].to_numpy(dtype=float, na_value=0.0)
+        else:
+            weights = np.ones(len(chunk))
+
+        valid = ((np.abs(lats) <= 90) & (np.abs(lngs) <= 180) &
+                 (hours >= 0) & (hours < HOURS_PER_WEEK))
+        rows = np.floor(lats[valid] / cell_deg).astype(np.int64)
+        cols = np.floor(lngs[valid] / cell_deg).astype(np.int64)
+        chunk_keys = _pack_keys(rows, cols, hours[valid].astype(np.int64))
+        n_incidents += int(valid.sum())
+
+        # Fold this chunk into the running per-(cell, hour) totals
+        keys, sums = _reduce(np.concatenate([keys, chunk_keys]), np.concatenate([sums, weights[valid]]))
+
+    rows, cols, hours = _unpack_keys(keys)
+    return rows, cols, hours, sums, n_incidents
+
+
+def _local_hours_of_week(timestamps, tz: Optional[tzinfo] = None) -> np.ndarray:
+    """
+    Hour of week per timestamp in local time (NaN where it cannot be parsed).
+
+    Like hour_of_week: timestamps with a UTC offset are converted to tz (UTC
+    if None), so one instant lands in one bucket whatever offset it was
+    written with; timestamps without one are taken as already local. Offsets
+    may differ from row to row.
+    """
+    import pandas as pd
+
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        times = timestamps
+        if times.dt.tz is not None:
+            times = times.dt.tz_convert(tz or "UTC").dt.tz_localize(None)
+    else:
+        text = timestamps.astype("string").str.strip()
+        aware = text.str.contains(_UTC_OFFSET, na=False).to_numpy()
+        times = pd.to_datetime(text.where(~aware), errors="coerce", format="ISO8601")
+        if aware.any():
+            converted = pd.to_datetime(text[aware], errors="coerce", format="ISO8601", utc=True)
+            times.loc[aware] = converted.dt.tz_convert(tz or "UTC").dt.tz_localize(None).to_numpy()
+
+    return (times.dt.dayofweek * 24 + times.dt.hour).to_numpy(dtype=float, na_value=np.nan)
+
+
+def _smooth_hours(counts: np.ndarray) -> np.ndarray:
+    """Circular [1/4, 1/2, 1/4] smoothing along the hour axis (axis 0)."""
+    return 0.5 * counts + 0.25 * (np.roll(counts, 1, axis=0) + np.roll(counts, -1, axis=0))
+
+
+class RiskCube:
+    """Hour-of-week x grid cell risk multipliers."""
+
+    def __init__(
+        self,
+        factors: np.ndarray,
+        cells: np.ndarray,
+        cell_deg: float,
+        hour_profile: np.ndarray
+    ):
+        """
+        Args:
+            factors: (168, n_cells) multipliers
+            cells: (n_cells,) sorted packed keys of the occupied grid cells
+            cell_deg: Cell size in degrees
+            hour_profile: (168,) city-wide multipliers used outside occupied cells
+        """
+        self.factors = factors
+        self.cells = cells
+        self.cell_deg = float(cell_deg)
+        self.hour_profile = hour_profile
+
+    @classmethod
+    def build(
+        cls,
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        hours: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+        cell_deg: float = RISK_CUBE_CELL_DEG,
+        prior: float = RISK_CUBE_PRIOR
+    ) -> Optional["RiskCube"]:
+        """Bin individual incidents into a cube (see from_cell_counts)."""
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+        weights = np.ones(len(lats)) if weights is None else np.asarray(weights, dtype=float)
+        rows = np.floor(lats / cell_deg).astype(np.int64)
+        cols = np.floor(lngs / cell_deg).astype(np.int64)
+        return cls.from_cell_counts(rows, cols, np.asarray(hours, dtype=np.int64), weights, cell_deg, prior)
+
+    @classmethod
+    def from_cell_counts(
+        cls,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        hours: np.ndarray,
+        weights: np.ndarray,
+        cell_deg: float = RISK_CUBE_CELL_DEG,
+        prior: float = RISK_CUBE_PRIOR
+    ) -> Optional["RiskCube"]:
+        """
+        Build a cube of factors averaging 1 over the week per cell.
+
+        factor[h, cell] = (n[h, cell] + prior * g[h]) / (n[cell] / 168 + prior)
+
+        where n are hour-smoothed incident counts and g is the city-wide
+        hourly profile, so cells with little data fall back to it.
+
+        Args:
+            rows, cols: Absolute grid cell indices (floor(coordinate / cell_deg))
+            hours: Hour of week per entry
+            weights: Incident count per entry
+
+        Returns:
+            RiskCube, or None if there are no incidents
+        """
+        if len(rows) == 0:
+            return None
+
+        # One column per occupied cell, however far apart the cells are
+        cells, cell_index = np.unique(_cell_keys(rows, cols), return_inverse=True)
+        counts = np.zeros((HOURS_PER_WEEK, len(cells)))
+        np.add.at(counts, (hours, cell_index), weights)
+        counts = _smooth_hours(counts)
+
+        hourly = counts.sum(axis=1)
+        hour_profile = hourly / max(hourly.mean(), 1e-12)
+
+        per_hour_mean = counts.sum(axis=0) / HOURS_PER_WEEK
+        factors = (counts + prior * hour_profile[:, None]) / (per_hour_mean + prior)
+        factors = np.clip(factors, RISK_FACTOR_MIN, RISK_FACTOR_MAX).astype(np.float32)
+
+        return cls(
+            factors,
+            cells,
+            cell_deg,
+            np.clip(hour_profile, RISK_FACTOR_MIN, RISK_FACTOR_MAX).astype(np.float32),
+        )
+
+    @classmethod
+    def from_file(cls, path: str, tz: Optional[tzinfo] = None) -> Optional["RiskCube"]:
+        """Build a cube from an incidents file, streamed in chunks (see aggregate_incidents)."""
+        rows, cols, hours, weights, n_incidents = aggregate_incidents(path, tz=tz)
+        cube = cls.from_cell_counts(rows, cols, hours, weights)
+        if cube is not None:
+            logger.info(f"Built risk cube of {len(cube.cells)} cells from {n_incidents} incidents in {path}")
+        return cube
+
+    def factors_at(self, lats: np.ndarray, lngs: np.ndarray, hour: int) -> np.ndarray:
+        """
+        Risk multipliers at points for one hour of week.
+
+        Args:
+            lats, lngs: Point coordinates
+            hour: Hour of week (0-167)
+
+        Returns:
+            Multiplier per point (city-wide profile outside the grid)
+        """
+        hour_slice = self.factors[hour % HOURS_PER_WEEK]
+        rows = np.floor(np.asarray(lats) / self.cell_deg).astype(np.int64)
+        cols = np.floor(np.asarray(lngs) / self.cell_deg).astype(np.int64)
+        keys = _cell_keys(rows, cols)
+        index = np.minimum(np.searchsorted(self.cells, keys), len(self.cells) - 1)
+        inside = self.cells[index] == keys
+
+        result = np.full(keys.shape, self.hour_profile[hour % HOURS_PER_WEEK], dtype=float)
+        result[inside] = hour_slice[index[inside]]
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return self.factors.nbytes + self.cells.nbytes + self.hour_profile.nbytes
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to store in the model artifact."""
+        return {
+            "cube_factors": self.factors,
+            "cube_cells": self.cells,
+            "cube_cell_deg": np.array(self.cell_deg),
+            "cube_hour_profile": self.hour_profile,
+        }
+
+    @classmethod
+    def from_arrays(cls, data) -> Optional["RiskCube"]:
+        """Restore a cube saved with to_arrays (None if the artifact has none)."""
+        if "cube_factors" not in data:
+            return None
+        return cls(
+            data["cube_factors"],
+            data["cube_cells"],
+            float(data["cube_cell_deg"]),
+            data["cube_hour_profile"],
+        )
@@ -0,0 +1,124 @@
+"""
+Route Cache for SafarSaheli Backend
+
+In-memory LRU store of scored /safest-route responses keyed by the snapped
+origin/destination pair, used stale-while-revalidate style:
+
+- fresh: stored by the current model version within the TTL, served as is
+- rescore: scored by another model version; the route geometry is still
+  good, so the caller re-scores it locally instead of refetching it
+- stale: route geometry older than the TTL; served immediately while a
+  background refresh fetches it again
+- last known: any stale entry up to max_stale_s old is also the fallback when
+  the routing provider is unavailable
+
+The TTL applies to the geometry: re-scoring an entry keeps its fetch time.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Set, Tuple
+
+FRESH = "fresh"
+RESCORE = "rescore"
+STALE = "stale"
+
+
+class RouteCache:
+    """LRU + TTL store of scored route responses, tagged by model version."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_s: float = 300.0,
+        max_stale_s: float = 86400.0,
+        precision: int = 4
+    ):
+        """
+        Args:
+            max_entries: Maximum number of cached O/D pairs
+            ttl_s: Seconds an entry stays fresh
+            max_stale_s: Seconds an entry may still be served as stale
+            precision: Decimal places used to snap coordinates (4 ~= 11 m)
+        """
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_stale_s = max_stale_s
+        self.precision = precision
+        self._entries: "OrderedDict[Tuple, Tuple[int, float, Any]]" = OrderedDict()
+        self._refreshing: Set[Tuple] = set()
+
+    def key(
+        self,
+        start_lat: float,
+        start_lng: float,
+        end_lat: float,
+        end_lng: float,
+        region: str = "",
+        hour: Optional[int] = None
+    ) -> Tuple:
+        """
+        Snap an O/D pair to a cache key, scoped to the model region serving it
+        and the departure hour of week (None for time-independent scoring).
+        """
+        p = self.precision
+        return (region, hour, round(start_lat, p), round(start_lng, p), round(end_lat, p), round(end_lng, p))
+
+    def lookup(self, key: Tuple, model_version: int) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Return (value, FRESH | RESCORE | STALE) for key, or (None, None) if nothing usable is stored.
+        
+        model_version is the version of the model serving the key's region;
+        entries scored by any other version need RESCORE (whatever their age),
+        entries past the TTL are STALE.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, None
+
+        version, stored_at, value = entry
+        age = time.monotonic() - stored_at
+        if age > self.max_stale_s:
+            del self._entries[key]
+            return None, None
+
+        self._entries.move_to_end(key)
+        if version != model_version:
+            return value, RESCORE
+        return value, FRESH if age <= self.ttl_s else STALE
+
+    def put(self, key: Tuple, model_version: int, value: Any):
+        """Store a value scored by model_version."""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (model_version, time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def rescored(self, key: Tuple, model_version: int, value: Any) -> str:
+        """
+        Replace an entry's value with one re-scored by model_version, keeping
+        its fetch time, and return its state now (FRESH or STALE).
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.put(key, model_version, value)
+            return FRESH
+        stored_at = entry[1]
+        self._entries[key] = (model_version, stored_at, value)
+        return FRESH if time.monotonic() - stored_at <= self.ttl_s else STALE
+
+    def begin_refresh(self, key: Tuple) -> bool:
+        """Claim the background refresh for key; False if one is already running."""
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        return True
+
+    def end_refresh(self, key: Tuple):
+        """Release a refresh claimed with begin_refresh."""
+        self._refreshing.discard(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
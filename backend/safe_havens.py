@@ -0,0 +1,129 @@
+"""
+Safe Havens for SafarSaheli Backend
+
+Local index of places to head for in an emergency (police stations, hospitals,
+busy public places), loaded once from a CSV file next to crime.csv. Lookups are
+pure in-memory numpy work with no network calls, so /sos can return the nearest
+havens in well under a millisecond.
+
+CSV columns: name, category, lat, lng
+"""
+
+import csv
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app_logging import get_logger
+
+logger = get_logger("safe_havens")
+
+EARTH_RADIUS_KM = 6371.0
+
+# Points sampled along the straight line to a haven when estimating approach risk
+APPROACH_SAMPLES = 10
+
+
+class SafeHavenIndex:
+    """
+    Nearest-haven lookup over a few hundred to a few thousand places.
+
+    At city scale a vectorized haversine over every haven plus argpartition is
+    faster than maintaining a tree, so the "index" is just precomputed
+    radian/cosine arrays.
+    """
+
+    def __init__(self, names: List[str], categories: List[str], lats: List[float], lngs: List[float]):
+        self.names = list(names)
+        self.categories = list(categories)
+        self.lats = np.asarray(lats, dtype=float)
+        self.lngs = np.asarray(lngs, dtype=float)
+        self._lat_rad = np.radians(self.lats)
+        self._lng_rad = np.radians(self.lngs)
+        self._cos_lat = np.cos(self._lat_rad)
+        self._category_array = np.asarray(self.categories)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "SafeHavenIndex":
+        """
+        Load havens from a CSV file; a missing file gives an empty index.
+
+        Args:
+            path: CSV with name, category, lat, lng columns
+        """
+        names, categories, lats, lngs = [], [], [], []
+        if not os.path.exists(path):
+            logger.warning(f"No safe haven data at {path}")
+            return cls(names, categories, lats, lngs)
+
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    lat, lng = float(row["lat"]), float(row["lng"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                names.append(row.get("name", "").strip())
+                categories.append(row.get("category", "").strip() or "other")
+                lats.append(lat)
+                lngs.append(lng)
+
+        logger.info(f"Loaded {len(names)} safe havens from {path}")
+        return cls(names, categories, lats, lngs)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 3,
+        categories: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Find the k nearest havens by great-circle distance.
+
+        Args:
+            lat, lng: Current location
+            k: Number of havens to return
+            categories: Optional category filter (e.g. ["police", "hospital"])
+
+        Returns:
+            Havens sorted by distance: dicts with name, category, location, distance_km
+        """
+        if len(self.names) == 0 or k <= 0:
+            return []
+
+        lat_rad, lng_rad = np.radians(lat), np.radians(lng)
+        a = (np.sin((self._lat_rad - lat_rad) / 2) ** 2 +
+             np.cos(lat_rad) * self._cos_lat * np.sin((self._lng_rad - lng_rad) / 2) ** 2)
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+        if categories:
+            distances = np.where(np.isin(self._category_array, categories), distances, np.inf)
+
+        k = min(k, len(distances))
+        candidates = np.argpartition(distances, k - 1)[:k]
+        ordered = candidates[np.argsort(distances[candidates])]
+
+        return [
+            {
+                "name": self.names[i],
+                "category": self.categories[i],
+                "location": [float(self.lats[i]), float(self.lngs[i])],
+                "distance_km": round(float(distances[i]), 3),
+            }
+            for i in ordered if np.isfinite(distances[i])
+        ]
+
+
+def approach_risk(ml_service, lat: float, lng: float, haven_lat: float, haven_lng: float) -> float:
+    """
+    Average crime risk along the straight line from a location to a haven.
+
+    Uses the same risk field as route scoring (MLModelService.point_risks).
+    """
+    t = np.linspace(0.0, 1.0, APPROACH_SAMPLES)
+    risks, _ = ml_service.point_risks(lat + (haven_lat - lat) * t, lng + (haven_lng - lng) * t)
+    return round(float(risks.mean()), 2)
@@ -0,0 +1,26 @@
+"""Shared fixtures for the backend tests (run from backend/: python -m pytest tests)."""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CRIME_CSV = os.path.join(os.path.dirname(BACKEND_DIR), "crime.csv")
+
+# Backend modules are flat files imported by name (as main.py does)
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="module")
+def crime_rows():
+    """crime.csv rows as dicts, the format /admin/crime-rows accepts."""
+    import pandas as pd
+    return pd.read_csv(CRIME_CSV).to_dict("records")
+
+
+@pytest.fixture
+def ml_service():
+    """A service built from crime.csv (no artifact read or written)."""
+    from ml_service import MLModelService
+    return MLModelService(CRIME_CSV)
@@ -0,0 +1,37 @@
+"""Client identification for per-client admission limits."""
+
+from admission import AdmissionController, Lane
+
+
+def _scope(forwarded=(), peer="10.0.0.9"):
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    return {"type": "http", "headers": headers, "client": (peer, 4321)}
+
+
+def test_forwarded_header_is_ignored_by_default():
+    controller = AdmissionController(routes=[], default_lane=Lane("default"))
+
+    assert controller.client_id(_scope(["1.2.3.4"])) == "10.0.0.9"
+
+
+def test_spoofed_leftmost_entries_do_not_change_the_client():
+    controller = AdmissionController(routes=[], default_lane=Lane("default"), trusted_proxy_hops=1)
+
+    # The client sends its own X-Forwarded-For; the proxy appends the real address
+    ids = {controller.client_id(_scope([f"203.0.113.{i}, 198.51.100.7"])) for i in range(40)}
+
+    assert ids == {"198.51.100.7"}
+
+
+def test_hop_count_reads_from_the_right_across_headers():
+    controller = AdmissionController(routes=[], default_lane=Lane("default"), trusted_proxy_hops=2)
+
+    scope = _scope(["6.6.6.6, 198.51.100.7", "172.16.0.1"])
+
+    assert controller.client_id(scope) == "198.51.100.7"
+
+
+def test_too_few_entries_fall_back_to_the_peer():
+    controller = AdmissionController(routes=[], default_lane=Lane("default"), trusted_proxy_hops=2)
+
+    assert controller.client_id(_scope(["198.51.100.7"])) == "10.0.0.9"
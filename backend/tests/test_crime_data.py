@@ -0,0 +1,73 @@
+"""Streaming crime data into the model arrays."""
+
+import numpy as np
+import pytest
+
+from data_sources import count_rows, iter_chunks
+
+
+@pytest.mark.parametrize("extension", [".csv", ".parquet", ".feather"])
+def test_formats_stream_to_the_same_points(tmp_path, crime_rows, ml_service, extension):
+    pytest.importorskip("pyarrow")
+    import pandas as pd
+    from ml_service import MLModelService
+
+    path = tmp_path / f"crime{extension}"
+    frame = pd.DataFrame(crime_rows)
+    {".csv": lambda p: frame.to_csv(p, index=False), ".parquet": frame.to_parquet,
+     ".feather": frame.to_feather}[extension](path)
+
+    assert count_rows(str(path)) == len(crime_rows)
+    assert sum(len(chunk) for chunk in iter_chunks(str(path), ["lat"], chunk_rows=50)) == len(crime_rows)
+
+    service = MLModelService(str(path))
+    assert service.crime_points.shape == (len(crime_rows), 3)
+    np.testing.assert_array_equal(service.crime_points, ml_service.crime_points)
+    assert service.area_names == ml_service.area_names
+
+
+def test_incidents_are_counted_per_cell_and_category(tmp_path):
+    from incident_grid import aggregate_incident_cells
+
+    path = tmp_path / "crime_incidents.csv"
+    path.write_text(
+        "lat,lng,category,count\n"
+        "28.611,77.211,Theft,1\n"
+        "28.612,77.219,theft,2\n"
+        "28.612,77.219,murder,1\n"
+        "28.655,77.201,arson,1\n"
+        "28.655,77.201,,1\n"
+        "nan,77.2,theft,1\n"
+    )
+
+    centers, counts, uncategorized, n_incidents = aggregate_incident_cells(str(path), ["murder", "theft"])
+
+    assert n_incidents == 5
+    np.testing.assert_allclose(centers, [[28.615, 77.215], [28.655, 77.205]])
+    np.testing.assert_array_equal(counts, [[1, 3], [0, 0]])
+    np.testing.assert_array_equal(uncategorized, [0, 2])
+
+
+def test_incident_feed_reaches_the_risk_arrays(tmp_path, crime_rows, ml_service):
+    import pandas as pd
+    from ml_service import MLModelService
+
+    crime_csv = tmp_path / "crime.csv"
+    pd.DataFrame(crime_rows).to_csv(crime_csv, index=False)
+    (tmp_path / "crime_incidents.csv").write_text(
+        "lat,lng,category\n" + "28.6101,77.2101,murder\n" * 30 + "28.7001,77.1001,\n"
+    )
+
+    service = MLModelService(str(crime_csv))
+
+    assert len(service.crime_points) == len(crime_rows) + 2
+    assert service.crime_features.shape[0] == len(service.crime_points)
+    assert len(service.cluster_labels) == len(service.crime_points)
+    cell = service.area_index["incident cell 28.6150,77.2150"]
+    assert service.crime_features[cell, 0] == 30
+    assert service.crime_points[cell, 2] > 0
+    # An uncategorized incident is spread across categories, one incident in total
+    spread = service.crime_features[service.area_index["incident cell 28.7050,77.1050"], :-1]
+    assert spread.sum() == pytest.approx(1) and (spread > 0).sum() > 1
+    route = np.array([[28.6101 + i * 0.0005, 77.2101] for i in range(20)])
+    assert service.score_route_safety(route) != ml_service.score_route_safety(route)
@@ -0,0 +1,100 @@
+"""Incremental crime-row upserts (/admin/crime-rows)."""
+
+import math
+
+import numpy as np
+import pytest
+
+
+def _route_near(lat, lng):
+    return np.array([[lat + i * 0.001, lng + i * 0.001] for i in range(20)])
+
+
+@pytest.mark.parametrize("column, value", [
+    ("murder", None),
+    ("theft", float("nan")),
+    ("lat", float("inf")),
+    ("long", None),
+])
+def test_non_finite_rows_are_rejected_without_touching_the_model(ml_service, crime_rows, column, value):
+    centers = ml_service.cluster_centers.copy()
+    risks = dict(ml_service.cluster_risk_scores)
+    n_points = len(ml_service.crime_points)
+
+    bad_row = dict(crime_rows[1], nm_pol="NEW AREA", **{column: value})
+    with pytest.raises(ValueError, match="non-finite"):
+        ml_service.with_crime_rows([crime_rows[0], bad_row])
+
+    np.testing.assert_array_equal(ml_service.cluster_centers, centers)
+    assert ml_service.cluster_risk_scores == risks
+    assert len(ml_service.crime_points) == n_points
+
+
+def test_valid_row_after_rejected_row_keeps_scores_meaningful(ml_service, crime_rows):
+    row = crime_rows[1]
+    with pytest.raises(ValueError):
+        ml_service.with_crime_rows([dict(row, murder=None)])
+
+    updated, result = ml_service.with_crime_rows([dict(row, nm_pol="NEW AREA")])
+
+    assert result == {"added": 1, "updated": 0}
+    assert np.isfinite(updated.cluster_centers).all()
+    assert all(math.isfinite(risk) for risk in updated.cluster_risk_scores.values())
+    score = updated.score_route_safety(_route_near(row["lat"], row["long"]))
+    assert 0 <= score < 100
+
+
+def test_empty_batch_is_a_no_op(ml_service):
+    assert ml_service.with_crime_rows([]) == (ml_service, {"added": 0, "updated": 0})
+
+
+def test_upsert_leaves_the_pinned_snapshot_untouched(ml_service, crime_rows):
+    route = _route_near(crime_rows[1]["lat"], crime_rows[1]["long"])
+    score = ml_service.score_route_safety(route)
+    centers = ml_service.cluster_centers.copy()
+    n_points = len(ml_service.crime_points)
+
+    heavier = {column: value * 10 if column not in ("nm_pol", "long", "lat") else value
+               for column, value in crime_rows[1].items()}
+    updated, result = ml_service.with_crime_rows([heavier, dict(crime_rows[2], nm_pol="NEW AREA")])
+
+    assert result == {"added": 1, "updated": 1}
+    assert len(updated.crime_points) == n_points + 1
+    assert updated.score_route_safety(route) != score
+    # The snapshot in-flight requests pinned still scores with the old data
+    assert len(ml_service.crime_points) == n_points
+    np.testing.assert_array_equal(ml_service.cluster_centers, centers)
+    assert ml_service.score_route_safety(route) == score
+
+
+def test_manager_ingest_swaps_in_a_new_snapshot(ml_service, crime_rows):
+    import asyncio
+    from model_manager import ModelManager
+
+    manager = ModelManager(ml_service.crime_csv_path, watch_interval_s=0)
+    manager._swap(ml_service, None)
+    versions = []
+    manager.add_swap_listener(versions.append)
+
+    result = asyncio.run(manager.ingest([dict(crime_rows[0], nm_pol="NEW AREA")]))
+
+    assert result == {"added": 1, "updated": 0}
+    assert manager.service is not ml_service
+    assert versions == [manager.version]
+    with pytest.raises(ValueError):
+        asyncio.run(manager.ingest([dict(crime_rows[0], murder=None)]))
+    assert versions == [manager.version]
+
+
+def test_batch_repeating_a_new_area_keeps_its_last_row(ml_service, crime_rows):
+    n_points = len(ml_service.crime_points)
+    first = dict(crime_rows[1], nm_pol="NEW AREA")
+    last = dict(crime_rows[2], nm_pol="NEW AREA")
+
+    updated, result = ml_service.with_crime_rows([first, crime_rows[3], last])
+
+    assert result == {"added": 1, "updated": 1}
+    assert len(updated.crime_points) == n_points + 1
+    idx = updated.area_index["NEW AREA"]
+    assert updated.crime_points[idx, :2].tolist() == [last["lat"], last["long"]]
+    assert updated.crime_features.shape[0] == len(updated.crime_points)
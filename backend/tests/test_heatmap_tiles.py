@@ -0,0 +1,43 @@
+"""Shared heatmap tile renders."""
+
+import asyncio
+import threading
+
+from heatmap_tiles import HeatmapTileCache
+
+
+class _SlowCache(HeatmapTileCache):
+    """Renders block until released, so a render can be cancelled mid-way."""
+
+    def __init__(self):
+        super().__init__(max_entries=16)
+        self.release = threading.Event()
+        self.renders = 0
+
+    @staticmethod
+    def fingerprint(service):
+        return "test"
+
+    def _render(self, service, key):
+        self.renders += 1
+        self.release.wait(5)
+        return b"tile"
+
+
+def test_waiters_take_over_when_the_rendering_request_is_cancelled():
+    async def scenario():
+        cache = _SlowCache()
+        first = asyncio.create_task(cache.get_tile(None, 12, 1, 2))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(cache.get_tile(None, 12, 1, 2))
+        await asyncio.sleep(0.05)
+
+        first.cancel()
+        await asyncio.sleep(0.05)
+        cache.release.set()
+
+        tile, _ = await asyncio.wait_for(waiter, timeout=2)
+        assert first.cancelled()
+        return tile
+
+    assert asyncio.run(scenario()) == b"tile"
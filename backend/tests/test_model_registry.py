@@ -0,0 +1,31 @@
+"""Picking the regional model (shard) for a route."""
+
+from model_manager import ModelManager
+from model_registry import ModelRegistry, Region
+
+DELHI = (28.61, 77.21)
+MUMBAI = (19.08, 72.88)
+NOWHERE = (12.97, 77.59)
+
+
+def _registry():
+    regions = [
+        Region("delhi", (28.40, 76.80, 28.90, 77.40), ModelManager("delhi.csv", watch_interval_s=0)),
+        Region("mumbai", (18.85, 72.75, 19.30, 73.05), ModelManager("mumbai.csv", watch_interval_s=0)),
+    ]
+    return ModelRegistry(regions, "delhi", memory_budget_bytes=2 ** 30)
+
+
+def test_start_region_wins_over_end_region():
+    registry = _registry()
+
+    assert registry.region_for(*DELHI, *MUMBAI).name == "delhi"
+    assert registry.region_for(*MUMBAI, *DELHI).name == "mumbai"
+
+
+def test_end_region_is_used_when_the_start_is_outside_every_region():
+    assert _registry().region_for(*NOWHERE, *MUMBAI).name == "mumbai"
+
+
+def test_default_region_is_used_outside_every_region():
+    assert _registry().region_for(*NOWHERE, *NOWHERE).name == "delhi"
@@ -0,0 +1,92 @@
+"""Hour-of-week bucketing and incident file handling."""
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from risk_cube import HOURS_PER_WEEK, RiskCube, aggregate_incidents, hour_of_week
+
+KOLKATA = ZoneInfo("Asia/Kolkata")
+
+
+def test_aware_times_are_bucketed_in_the_region_timezone():
+    # Monday 23:00 UTC is Tuesday 04:30 in Delhi
+    utc = datetime(2024, 1, 1, 23, 0, tzinfo=timezone.utc)
+    ist = datetime(2024, 1, 1, 23, 0, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+
+    assert hour_of_week(utc, KOLKATA) == 24 + 4
+    assert hour_of_week(ist, KOLKATA) == 23
+
+
+def test_same_instant_gets_the_same_hour_whatever_the_offset():
+    instant = datetime(2024, 1, 5, 17, 30, tzinfo=timezone.utc)
+
+    assert hour_of_week(instant, KOLKATA) == hour_of_week(instant.astimezone(KOLKATA), KOLKATA)
+
+
+def test_naive_times_are_taken_as_local():
+    assert hour_of_week(datetime(2024, 1, 1, 23, 0), KOLKATA) == 23
+
+
+def test_undated_incident_files_are_rejected_clearly(tmp_path):
+    path = tmp_path / "crime_times.csv"
+    path.write_text("lat,lng\n28.6,77.2\n")
+
+    with pytest.raises(KeyError, match="no timestamp or day_of_week/hour"):
+        aggregate_incidents(str(path))
+
+
+def test_incident_timestamps_are_binned_in_the_region_timezone(tmp_path):
+    path = tmp_path / "crime_times.csv"
+    # One instant (Tuesday 04:30 in Delhi) written with different offsets, then a local time
+    path.write_text(
+        "lat,lng,timestamp\n"
+        "28.6,77.2,2024-01-01T23:00:00Z\n"
+        "28.6,77.2,2024-01-02T04:30:00+05:30\n"
+        "28.6,77.2,2024-01-01T18:00:00-05:00\n"
+        "28.6,77.2,2024-01-02 04:45\n"
+    )
+
+    _, _, hours, weights, n_incidents = aggregate_incidents(str(path), tz=KOLKATA)
+
+    assert n_incidents == 4
+    assert hours.tolist() == [24 + 4]
+    assert weights.tolist() == [4]
+
+
+def test_model_build_bins_mixed_offset_incident_times(tmp_path, crime_rows):
+    import pandas as pd
+    from ml_service import MLModelService
+
+    crime_csv = tmp_path / "crime.csv"
+    pd.DataFrame(crime_rows).to_csv(crime_csv, index=False)
+    (tmp_path / "crime_times.csv").write_text(
+        "lat,lng,timestamp\n"
+        "28.6,77.2,2024-01-01T23:00:00Z\n"
+        "28.7,77.1,2024-01-01T22:00:00+05:30\n"
+        "28.6,77.2,not a time\n"
+    )
+
+    service = MLModelService(str(crime_csv))
+
+    assert service.risk_cube is not None
+    assert len(service.crime_points) == len(crime_rows)
+
+
+def test_cube_stores_only_occupied_cells():
+    # Delhi incidents plus one mis-geocoded row at (0, 0)
+    lats = np.array([28.61, 28.61, 28.72, 0.0])
+    lngs = np.array([77.21, 77.21, 77.05, 0.0])
+    hours = np.array([23, 23, 10, 5])
+
+    cube = RiskCube.build(lats, lngs, hours)
+
+    assert cube.factors.shape == (HOURS_PER_WEEK, 3)
+    # Points in occupied cells read their own cell's column; others get the city-wide profile
+    factors = cube.factors_at(np.array([0.005, 28.615, 28.725, 19.0]), np.array([0.005, 77.215, 77.055, 72.8]), 23)
+    np.testing.assert_array_equal(factors[:3], cube.factors[23])
+    assert factors[3] == cube.hour_profile[23]
+    restored = RiskCube.from_arrays(cube.to_arrays())
+    np.testing.assert_array_equal(restored.factors_at(lats, lngs, 23), cube.factors_at(lats, lngs, 23))
@@ -0,0 +1,40 @@
+"""Route cache states: fresh, rescore (new model) and stale (expired geometry)."""
+
+from route_cache import FRESH, RESCORE, STALE, RouteCache
+
+
+def test_new_model_version_asks_for_a_rescore_not_a_refetch():
+    cache = RouteCache(ttl_s=300)
+    key = cache.key(28.6, 77.2, 28.7, 77.3, region="delhi")
+    cache.put(key, 1, "scored by v1")
+
+    assert cache.lookup(key, 1) == ("scored by v1", FRESH)
+    assert cache.lookup(key, 2) == ("scored by v1", RESCORE)
+
+    assert cache.rescored(key, 2, "scored by v2") == FRESH
+    assert cache.lookup(key, 2) == ("scored by v2", FRESH)
+
+
+def test_rescoring_keeps_the_geometry_fetch_time(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("route_cache.time.monotonic", lambda: now[0])
+    cache = RouteCache(ttl_s=300)
+    key = cache.key(28.6, 77.2, 28.7, 77.3)
+    cache.put(key, 1, "v1")
+
+    now[0] += 400
+    assert cache.lookup(key, 2) == ("v1", RESCORE)
+    assert cache.rescored(key, 2, "v2") == STALE
+    assert cache.lookup(key, 2) == ("v2", STALE)
+
+
+def test_regions_are_versioned_independently():
+    cache = RouteCache()
+    delhi = cache.key(28.6, 77.2, 28.7, 77.3, region="delhi")
+    mumbai = cache.key(19.0, 72.8, 19.1, 72.9, region="mumbai")
+    cache.put(delhi, 5, "delhi route")
+    cache.put(mumbai, 1, "mumbai route")
+
+    # A new Delhi model (version 6) leaves Mumbai's entries fresh
+    assert cache.lookup(delhi, 6)[1] == RESCORE
+    assert cache.lookup(mumbai, 1)[1] == FRESH
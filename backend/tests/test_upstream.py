@@ -0,0 +1,52 @@
+"""Circuit breaker half-open probing."""
+
+from upstream import CircuitBreaker
+
+
+def _half_open_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_s=0)
+    breaker.record_failure(breaker.allow())
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_only_one_probe_while_half_open():
+    breaker = _half_open_breaker()
+
+    probe = breaker.allow()
+
+    assert probe is not None and probe.probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() is None
+
+
+def test_stale_call_cannot_free_the_probe_slot_or_close_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout_s=0)
+    stale = breaker.allow()  # admitted while closed, still in flight
+    breaker.record_failure(breaker.allow())
+    breaker.record_failure(breaker.allow())
+    probe = breaker.allow()
+    assert probe.probe and not stale.probe
+
+    breaker.release(stale)  # e.g. the stale call got a 429 or was cancelled
+    assert breaker.allow() is None
+
+    breaker.record_success(stale)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() is None
+
+    breaker.record_success(probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+
+
+def test_failed_probe_reopens_and_a_released_probe_can_be_retried():
+    breaker = _half_open_breaker()
+
+    breaker.record_failure(breaker.allow())
+    assert breaker.state == CircuitBreaker.OPEN
+
+    probe = breaker.allow()
+    breaker.release(probe)
+    retry = breaker.allow()
+    assert retry is not None and retry.probe
@@ -0,0 +1,346 @@
+"""
+Upstream Governor for SafarSaheli Backend
+
+Shared rate limiting and circuit breaking for calls to external APIs (Geoapify
+routing). A token
+bucket sized to the provider plan is shared by every request, and callers state
+a priority: primary calls (the alternatives request) wait briefly for a token,
+while fallback calls (extra route preferences) are skipped as soon as the bucket
+runs low. Under load this trades route variety for throughput instead of letting
+every request hit the provider's rate limit at once. A circuit breaker makes
+calls fail fast while the provider is down instead of waiting out timeouts.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from app_logging import get_logger
+
+logger = get_logger("upstream")
+
+# Call priorities (lower value = more important)
+PRIORITY_PRIMARY = 0
+PRIORITY_FALLBACK = 1
+
+
+class UpstreamError(Exception):
+    """Base class for upstream failures that callers should answer with a 503."""
+
+    def __init__(self, message: str, retry_after_s: float = 1.0):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+class UpstreamBusyError(UpstreamError):
+    """Raised when an upstream call cannot be made within the rate budget."""
+
+
+class UpstreamUnavailableError(UpstreamError):
+    """Raised when the upstream is failing or its circuit breaker is open."""
+
+
+class TokenBucket:
+    """Classic token bucket: `rate_per_s` tokens are added per second up to `capacity`."""
+
+    def __init__(self, rate_per_s: float, capacity: float):
+        """
+        Args:
+            rate_per_s: Tokens added per second
+            capacity: Maximum tokens held (burst size)
+        """
+        self.rate_per_s = rate_per_s
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available."""
+        self._refill()
+        return self._tokens
+
+    def try_take(self, tokens: float = 1.0, reserve: float = 0.0) -> bool:
+        """Take tokens if at least `tokens + reserve` are available."""
+        self._refill()
+        if self._tokens >= tokens + reserve:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def time_until(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` will be available."""
+        self._refill()
+        missing = tokens - self._tokens
+        return max(0.0, missing / self.rate_per_s) if self.rate_per_s > 0 else float("inf")
+
+    def drain(self):
+        """Empty the bucket (used to back off after the provider signals rate limiting)."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+
+class UpstreamGovernor:
+    """
+    Priority-aware admission for calls to one upstream API.
+
+    - Primary calls queue (FIFO) for up to `max_wait_s` for a token and are
+      rejected immediately if the queue ahead of them cannot clear in time.
+    - Fallback calls never wait: they are skipped when a primary call is
+      waiting or when fewer than `fallback_reserve` tokens would remain.
+    - An optional daily quota (plan credits) is enforced and reported.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_s: float,
+        burst: float,
+        fallback_reserve: float = 1.0,
+        max_wait_s: float = 2.0,
+        daily_quota: Optional[int] = None
+    ):
+        """
+        Args:
+            name: Upstream name (for logs and stats)
+            rate_per_s: Sustained requests per second allowed by the plan
+            burst: Maximum requests that can be made back to back
+            fallback_reserve: Tokens kept back for primary calls
+            max_wait_s: Longest a primary call waits for a token
+            daily_quota: Optional requests per UTC day (None = unlimited)
+        """
+        self.name = name
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self.fallback_reserve = fallback_reserve
+        self.max_wait_s = max_wait_s
+        self.daily_quota = daily_quota
+        self._primary_queue = asyncio.Lock()
+        self._primary_waiting = 0
+        self._day = self._utc_day()
+        self.used_today = 0
+        self.granted = {PRIORITY_PRIMARY: 0, PRIORITY_FALLBACK: 0}
+        self.rejected = {PRIORITY_PRIMARY: 0, PRIORITY_FALLBACK: 0}
+        self.throttled_by_upstream = 0
+        self.cancelled_in_flight = 0
+
+    @staticmethod
+    def _utc_day() -> int:
+        return int(time.time() // 86400)
+
+    def _quota_exhausted(self) -> bool:
+        day = self._utc_day()
+        if day != self._day:
+            self._day = day
+            self.used_today = 0
+        return self.daily_quota is not None and self.used_today >= self.daily_quota
+
+    def _grant(self, priority: int) -> bool:
+        self.granted[priority] += 1
+        self.used_today += 1
+        return True
+
+    def _reject(self, priority: int) -> bool:
+        self.rejected[priority] += 1
+        return False
+
+    async def acquire(self, priority: int = PRIORITY_PRIMARY) -> bool:
+        """
+        Ask permission for one upstream call.
+
+        Args:
+            priority: PRIORITY_PRIMARY or PRIORITY_FALLBACK
+
+        Returns:
+            True if the call may proceed, False if it should be skipped
+        """
+        if self._quota_exhausted():
+            return self._reject(priority)
+
+        if priority != PRIORITY_PRIMARY:
+            if self._primary_waiting == 0 and self.bucket.try_take(1.0, self.fallback_reserve):
+                return self._grant(priority)
+            return self._reject(priority)
+
+        # Fast path: token available and nobody queued ahead
+        if self._primary_waiting == 0 and self.bucket.try_take():
+            return self._grant(priority)
+
+        # Reject now if the queue ahead cannot clear within max_wait_s
+        expected_wait = self.bucket.time_until(self._primary_waiting + 1.0)
+        if expected_wait > self.max_wait_s:
+            return self._reject(priority)
+
+        self._primary_waiting += 1
+        try:
+            deadline = time.monotonic() + self.max_wait_s
+            async with self._primary_queue:
+                while not self.bucket.try_take():
+                    wait = self.bucket.time_until()
+                    if time.monotonic() + wait > deadline:
+                        return self._reject(priority)
+                    await asyncio.sleep(wait)
+                return self._grant(priority)
+        finally:
+            self._primary_waiting -= 1
+
+    def retry_after_s(self) -> float:
+        """Suggested client back-off when a primary call is rejected."""
+        if self._quota_exhausted():
+            return float(86400 - time.time() % 86400)
+        return max(1.0, self.bucket.time_until(self._primary_waiting + 1.0))
+
+    def note_cancelled(self):
+        """Record a granted call abandoned mid-flight because its request was cancelled."""
+        self.cancelled_in_flight += 1
+
+    def note_throttled(self):
+        """Record a 429 from the provider and back off by draining the bucket."""
+        self.throttled_by_upstream += 1
+        self.bucket.drain()
+
+    def stats(self) -> Dict:
+        """Quota usage and admission counters."""
+        self._quota_exhausted()
+        return {
+            "rate_per_s": self.bucket.rate_per_s,
+            "burst": self.bucket.capacity,
+            "tokens_available": round(self.bucket.tokens, 2),
+            "primary_waiting": self._primary_waiting,
+            "used_today": self.used_today,
+            "daily_quota": self.daily_quota,
+            "granted": {"primary": self.granted[PRIORITY_PRIMARY], "fallback": self.granted[PRIORITY_FALLBACK]},
+            "skipped": {"primary": self.rejected[PRIORITY_PRIMARY], "fallback": self.rejected[PRIORITY_FALLBACK]},
+            "throttled_by_upstream": self.throttled_by_upstream,
+            "cancelled_in_flight": self.cancelled_in_flight,
+        }
+
+
+class BreakerPermit:
+    """An allowed call, handed back to the breaker with its outcome."""
+
+    __slots__ = ("probe",)
+
+    def __init__(self, probe: bool):
+        self.probe = probe
+
+
+class CircuitBreaker:
+    """
+    Fail fast while an upstream is down.
+
+    - closed: calls flow; `failure_threshold` consecutive failures open the circuit
+    - open: calls are refused immediately for `reset_timeout_s`
+    - half-open: one probe call is let through; success closes the circuit,
+      failure opens it again
+
+    allow() hands out a BreakerPermit that the caller passes back with the
+    outcome, so only the probe itself can finish the half-open trial; calls
+    admitted earlier (while closed) that finish during it cannot close the
+    circuit or free the probe slot.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout_s: float = 30.0):
+        """
+        Args:
+            name: Upstream name (for logs and stats)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout_s: Seconds to stay open before probing again
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe: Optional[BreakerPermit] = None
+        self.times_opened = 0
+        self.fast_failed = 0
+
+    def allow(self) -> Optional[BreakerPermit]:
+        """Return a permit if a call may be attempted now, else None."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout_s:
+                self.fast_failed += 1
+                return None
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN:
+            if self._probe is not None:
+                self.fast_failed += 1
+                return None
+            self._probe = BreakerPermit(probe=True)
+            return self._probe
+
+        return BreakerPermit(probe=False)
+
+    def release(self, permit: BreakerPermit):
+        """Give back an allowed call that was not attempted or proved nothing about health."""
+        if permit is self._probe:
+            self._probe = None
+
+    def record_success(self, permit: BreakerPermit):
+        """The upstream answered; the probe's success closes the circuit."""
+        if permit is self._probe:
+            self._probe = None
+            logger.info(f"{self.name} circuit closed")
+            self.state = self.CLOSED
+        if self.state == self.CLOSED:
+            self.consecutive_failures = 0
+
+    def record_failure(self, permit: BreakerPermit):
+        """The upstream timed out, was unreachable or returned a server error."""
+        self.consecutive_failures += 1
+        probe_failed = permit is self._probe
+        if probe_failed or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"{self.name} circuit opened after "
+                               f"{self.consecutive_failures} consecutive failure(s)")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            # A probe still in flight cannot close the reopened circuit
+            self._probe = None
+
+    def retry_after_s(self) -> float:
+        """Seconds until the next probe will be allowed."""
+        if self.state != self.OPEN:
+            return 1.0
+        return max(1.0, self.reset_timeout_s - (time.monotonic() - self._opened_at))
+
+    def stats(self) -> Dict:
+        """Breaker state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "fast_failed": self.fast_failed,
+        }
+
+
+# Shared by every MLModelService snapshot, so reloads do not reset the budget.
+# Rate defaults match Geoapify's free plan (5 requests/second); set
+# GEOAPIFY_DAILY_QUOTA to enforce the plan's daily credits as well.
+geoapify_governor = UpstreamGovernor(
+    "geoapify",
+    rate_per_s=float(os.getenv("GEOAPIFY_RATE_PER_S", "5")),
+    burst=float(os.getenv("GEOAPIFY_BURST", "5")),
+    fallback_reserve=float(os.getenv("GEOAPIFY_FALLBACK_RESERVE", "2")),
+    max_wait_s=float(os.getenv("GEOAPIFY_MAX_WAIT_S", "2")),
+    daily_quota=int(os.getenv("GEOAPIFY_DAILY_QUOTA")) if os.getenv("GEOAPIFY_DAILY_QUOTA") else None,
+)
+
+geoapify_breaker = CircuitBreaker(
+    "geoapify",
+    failure_threshold=int(os.getenv("GEOAPIFY_BREAKER_FAILURES", "3")),
+    reset_timeout_s=float(os.getenv("GEOAPIFY_BREAKER_RESET_S", "30")),
+)